@@ -0,0 +1,182 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Dict, Any, Optional
+
+
+class AnalysisCache:
+    """Persistent SQLite cache of analyze_file results.
+
+    Entries are keyed by path and validated against size, mtime, a sampled
+    content fingerprint and an analysis context (provider, model, prompt
+    template). The cache is capped at ``max_entries`` with LRU eviction.
+    """
+
+    DEFAULT_FILENAME = "analysis_cache.sqlite3"
+
+    def __init__(self, db_path: str, max_entries: int = 200000,
+                 fingerprint_bytes: int = 64 * 1024):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.fingerprint_bytes = fingerprint_bytes
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS analysis_cache (
+                   path TEXT PRIMARY KEY,
+                   size INTEGER NOT NULL,
+                   mtime_ns INTEGER NOT NULL,
+                   fingerprint TEXT NOT NULL,
+                   context TEXT NOT NULL,
+                   result TEXT NOT NULL,
+                   last_used REAL NOT NULL
+               )"""
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_analysis_cache_last_used "
+            "ON analysis_cache(last_used)"
+        )
+        self._conn.commit()
+        self._entry_count = self._conn.execute(
+            "SELECT COUNT(*) FROM analysis_cache").fetchone()[0]
+
+    @classmethod
+    def from_config(cls, config_manager) -> Optional["AnalysisCache"]:
+        """Create the cache described by the ``analysis_cache`` setting, or None if disabled."""
+        settings = {}
+        config_path = "config.json"
+        if config_manager:
+            settings = config_manager.get_setting("analysis_cache", {}) or {}
+            config_path = config_manager.config_path
+        if not settings.get("enabled", True):
+            return None
+
+        db_path = settings.get("path") or os.path.join(
+            os.path.dirname(os.path.abspath(config_path)), cls.DEFAULT_FILENAME)
+        try:
+            return cls(
+                db_path,
+                max_entries=int(settings.get("max_entries", 200000)),
+                fingerprint_bytes=int(settings.get("fingerprint_bytes", 64 * 1024)),
+            )
+        except (sqlite3.Error, OSError) as e:
+            print(f"Analysis cache disabled: {str(e)}")
+            return None
+
+    @staticmethod
+    def make_context(**parts: Any) -> str:
+        """Hash the settings that influence an analysis result into a context key."""
+        encoded = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+    def fingerprint(self, file_path: str, size: int) -> str:
+        """Fingerprint the file from its size and sampled head/tail bytes."""
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(str(size).encode("ascii"))
+        with open(file_path, "rb") as f:
+            digest.update(f.read(self.fingerprint_bytes))
+            if size > 2 * self.fingerprint_bytes:
+                f.seek(-self.fingerprint_bytes, os.SEEK_END)
+                digest.update(f.read(self.fingerprint_bytes))
+        return digest.hexdigest()
+
+    def get(self, file_path: str, stats: os.stat_result, context: str) -> Optional[Dict[str, Any]]:
+        """Return the cached result for an unchanged file, or None on a miss."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT size, mtime_ns, fingerprint, context, result "
+                "FROM analysis_cache WHERE path = ?", (file_path,)
+            ).fetchone()
+
+        if (row is None or row[0] != stats.st_size or row[1] != stats.st_mtime_ns
+                or row[3] != context):
+            self.stats["misses"] += 1
+            return None
+
+        try:
+            if self.fingerprint(file_path, stats.st_size) != row[2]:
+                self.stats["misses"] += 1
+                return None
+            result = json.loads(row[4])
+        except (OSError, ValueError):
+            self.stats["misses"] += 1
+            return None
+
+        with self._lock:
+            self._conn.execute(
+                "UPDATE analysis_cache SET last_used = ? WHERE path = ?",
+                (time.time(), file_path))
+            self._conn.commit()
+        self.stats["hits"] += 1
+        return result
+
+    def put(self, file_path: str, stats: os.stat_result, context: str,
+            result: Dict[str, Any], fingerprint: Optional[str] = None) -> None:
+        """Store an analysis result and evict least recently used entries over the cap."""
+        try:
+            if fingerprint is None:
+                fingerprint = self.fingerprint(file_path, stats.st_size)
+            payload = json.dumps(result, ensure_ascii=False, default=str)
+        except (OSError, TypeError, ValueError) as e:
+            print(f"Skipping cache store for {file_path}: {str(e)}")
+            return
+
+        with self._lock:
+            existed = self._conn.execute(
+                "SELECT 1 FROM analysis_cache WHERE path = ?", (file_path,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO analysis_cache "
+                "(path, size, mtime_ns, fingerprint, context, result, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (file_path, stats.st_size, stats.st_mtime_ns, fingerprint,
+                 context, payload, time.time()))
+            if not existed:
+                self._entry_count += 1
+            if self._entry_count > self.max_entries:
+                self._evict()
+            self._conn.commit()
+        self.stats["stores"] += 1
+
+    def _evict(self) -> None:
+        """Drop the least recently used entries, leaving some headroom below the cap."""
+        target = int(self.max_entries * 0.9)
+        excess = self._entry_count - target
+        if excess <= 0:
+            return
+        self._conn.execute(
+            "DELETE FROM analysis_cache WHERE path IN ("
+            "SELECT path FROM analysis_cache ORDER BY last_used ASC LIMIT ?)",
+            (excess,))
+        self._entry_count -= excess
+        self.stats["evictions"] += excess
+
+    def invalidate(self, file_path: Optional[str] = None) -> None:
+        """Remove one entry, or every entry when no path is given."""
+        with self._lock:
+            if file_path is None:
+                self._conn.execute("DELETE FROM analysis_cache")
+                self._entry_count = 0
+            else:
+                cursor = self._conn.execute(
+                    "DELETE FROM analysis_cache WHERE path = ?", (file_path,))
+                self._entry_count -= cursor.rowcount
+            self._conn.commit()
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get cache hit/miss statistics"""
+        stats = self.stats.copy()
+        stats["entries"] = self._entry_count
+        return stats
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,156 @@
+import re
+import json
+from typing import Dict, Any, Optional
+
+# PARA main categories as stored on analysis records
+PARA_CATEGORIES = ['projects', 'areas', 'resources', 'archives']
+
+CONFIDENCE_LEVELS = ['high', 'medium', 'low']
+
+# Fields of the structured response and the Python types they must have
+ANALYSIS_SCHEMA = {
+    'category': str,
+    'subcategory': str,
+    'confidence': str,
+    'summary': str,
+    'keywords': list,
+    'suggested_name': str,
+}
+
+REQUIRED_FIELDS = ['category']
+
+# Labels the line-based prompt asks for, in order; a reply is complete once all have arrived
+TEXT_FIELD_LABELS = ['category', 'subcategory', 'confidence', 'summary', 'keywords', 'suggested name']
+
+_CATEGORY_MAP = {
+    'projects': 'projects',
+    'project': 'projects',
+    'areas': 'areas',
+    'area': 'areas',
+    'resources': 'resources',
+    'resource': 'resources',
+    'archives': 'archives',
+    'archive': 'archives',
+    '프로젝트': 'projects',
+    '영역': 'areas',
+    '자료': 'resources',
+    '보관': 'archives'
+}
+
+_TEXT_LABELS = {
+    'category': 'category',
+    'subcategory': 'subcategory',
+    'confidence': 'confidence',
+    'summary': 'summary',
+    'keywords': 'keywords',
+    'suggested name': 'suggested_name',
+    'suggested filename': 'suggested_name',
+}
+
+
+def _strip_label_value(value: str) -> str:
+    """Remove markdown emphasis and a trailing translation in parentheses."""
+    value = re.sub(r'\*\*|\*', '', value).strip()
+    match = re.match(r'([^(]+)(?:\s*\([^)]+\))?', value)
+    return match.group(1).strip() if match else value
+
+
+def normalize_category(value: str) -> str:
+    """Map an English or Korean PARA category name to its record key, or '' if unknown."""
+    return _CATEGORY_MAP.get(_strip_label_value(value or '').lower(), '')
+
+
+def normalize_subcategory(value: str) -> str:
+    return _strip_label_value(value or '').lower()
+
+
+def normalize_confidence(value: str) -> str:
+    level = _strip_label_value(value or '').lower()
+    return level if level in CONFIDENCE_LEVELS else ''
+
+
+def validate_analysis(data: Any) -> Optional[Dict[str, Any]]:
+    """
+    Validate a structured response against ANALYSIS_SCHEMA and return the
+    typed fields, or None if it does not conform.
+    """
+    if not isinstance(data, dict):
+        return None
+    for field in REQUIRED_FIELDS:
+        if not data.get(field):
+            return None
+
+    fields = {}
+    for field, expected in ANALYSIS_SCHEMA.items():
+        value = data.get(field)
+        if value is None:
+            continue
+        if field == 'keywords' and isinstance(value, str):
+            value = [k.strip() for k in value.split(',') if k.strip()]
+        if not isinstance(value, expected):
+            return None
+        fields[field] = value
+
+    return {
+        'category': normalize_category(fields['category']),
+        'subcategory': normalize_subcategory(fields.get('subcategory', '')),
+        'confidence': normalize_confidence(fields.get('confidence', '')),
+        'summary': fields.get('summary', '').strip(),
+        'keywords': [str(k).strip() for k in fields.get('keywords', []) if str(k).strip()],
+        'suggested_name': re.sub(r'\*\*|\*', '', fields.get('suggested_name', '')).strip() or None,
+    }
+
+
+def parse_json_response(text: str) -> Any:
+    """Decode the JSON value in a response, tolerating code fences and surrounding prose."""
+    text = (text or '').strip()
+    try:
+        return json.loads(text)
+    except ValueError:
+        pass
+    starts = [i for i in (text.find('{'), text.find('[')) if i != -1]
+    if not starts:
+        return None
+    start = min(starts)
+    end = text.rfind('}' if text[start] == '{' else ']')
+    if end <= start:
+        return None
+    try:
+        return json.loads(text[start:end + 1])
+    except ValueError:
+        return None
+
+
+def parse_analysis_text(text: str) -> Dict[str, Any]:
+    """Parse the line-based 'Category: ...' response format into typed fields."""
+    raw = {}
+    for line in (text or '').split('\n'):
+        if ':' not in line:
+            continue
+        label, value = line.split(':', 1)
+        key = _TEXT_LABELS.get(re.sub(r'\*\*|\*', '', label).strip().lower())
+        if key and key not in raw:
+            raw[key] = value.strip()
+
+    keywords = re.sub(r'\*\*|\*', '', raw.get('keywords', '')).strip('[] ')
+    return {
+        'category': normalize_category(raw.get('category', '')),
+        'subcategory': normalize_subcategory(raw.get('subcategory', '')),
+        'confidence': normalize_confidence(raw.get('confidence', '')),
+        'summary': re.sub(r'\*\*|\*', '', raw.get('summary', '')).strip('[] '),
+        'keywords': [k.strip() for k in keywords.split(',') if k.strip()],
+        'suggested_name': re.sub(r'\*\*|\*', '', raw.get('suggested_name', '')).strip() or None,
+    }
+
+
+def ensure_fields(content_analysis: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Make sure a successful content analysis carries typed fields, parsing the
+    stored text once for records created before structured output existed.
+    """
+    if content_analysis.get('success') and 'category' not in content_analysis:
+        fields = parse_analysis_text(content_analysis.get('analysis', ''))
+        if 'suggested_name' in content_analysis:
+            fields.pop('suggested_name')
+        content_analysis.update(fields)
+    return content_analysis
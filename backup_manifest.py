@@ -0,0 +1,131 @@
+import os
+import json
+import errno
+import shutil
+import threading
+from datetime import datetime
+from typing import Dict, Any, List
+
+# ioctl request to share a file's extents with another (btrfs, XFS, bcachefs)
+FICLONE = 0x40049409
+
+# Link and clone errors that mean "not possible on this device", so the method is not tried there again
+UNSUPPORTED_ERRNOS = {errno.EXDEV, errno.EOPNOTSUPP, errno.ENOTTY, errno.EINVAL,
+                      errno.EMLINK, getattr(errno, 'ENOTSUP', errno.EOPNOTSUPP), errno.ENOSYS}
+
+# Errors about one file (e.g. protected_hardlinks refusing another user's file); only it falls back
+PER_FILE_ERRNOS = {errno.EPERM}
+
+
+class ManifestBackup:
+    """
+    Backup of only the files an organize run is about to move, instead of a
+    copy of the whole tree. Each file is cloned with a reflink where the
+    filesystem supports it, hard-linked otherwise, and copied only across
+    devices, so the backup costs little space or time on the same disk.
+
+    Hard links share content with the original. That is enough here because
+    organizing only moves and renames files. ``manifest.json`` lists every
+    backed-up file so ``restore`` can put them back.
+    """
+
+    MANIFEST = "manifest.json"
+    METHODS = ['reflink', 'hardlink', 'copy']
+
+    def __init__(self):
+        # (method, source device) pairs that failed once; not retried
+        self._unsupported = set()
+        self._lock = threading.Lock()
+
+    def _reflink(self, source: str, target: str) -> None:
+        import fcntl
+        with open(source, 'rb') as src, open(target, 'wb') as dst:
+            try:
+                fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+            except OSError:
+                dst.close()
+                os.unlink(target)
+                raise
+        shutil.copystat(source, target)
+
+    def _clone(self, source: str, target: str, device: int) -> str:
+        """Back up one file with the cheapest method that works; returns the method."""
+        for method in self.METHODS:
+            if (method, device) in self._unsupported:
+                continue
+            try:
+                if method == 'reflink':
+                    if os.name != 'posix':
+                        raise OSError(errno.EOPNOTSUPP, "reflinks are not supported")
+                    self._reflink(source, target)
+                elif method == 'hardlink':
+                    os.link(source, target)
+                else:
+                    shutil.copy2(source, target)
+                return method
+            except OSError as e:
+                if method == 'copy' or e.errno not in UNSUPPORTED_ERRNOS | PER_FILE_ERRNOS:
+                    raise
+                if e.errno in PER_FILE_ERRNOS:
+                    continue
+                with self._lock:
+                    self._unsupported.add((method, device))
+
+    def create(self, source_dir: str, paths: List[str], backup_dir: str) -> Dict[str, Any]:
+        """
+        Back up ``paths`` (files under ``source_dir``) into ``backup_dir``,
+        keeping their relative layout, and write the manifest.
+        """
+        os.makedirs(backup_dir, exist_ok=True)
+        entries = []
+        for path in paths:
+            relative = os.path.relpath(path, source_dir)
+            target = os.path.join(backup_dir, relative)
+            try:
+                stats = os.stat(path)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                method = self._clone(path, target, stats.st_dev)
+            except OSError as e:
+                print(f"Could not back up {path}: {str(e)}")
+                continue
+            entries.append({"path": relative, "size": stats.st_size,
+                            "mtime_ns": stats.st_mtime_ns, "method": method})
+
+        manifest = {
+            "source_dir": source_dir,
+            "created": datetime.now().isoformat(),
+            "files": entries
+        }
+        manifest_path = os.path.join(backup_dir, self.MANIFEST)
+        with open(manifest_path + ".tmp", 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(manifest_path + ".tmp", manifest_path)
+        return manifest
+
+    def restore(self, backup_dir: str, overwrite: bool = False) -> Dict[str, int]:
+        """
+        Put the files of a backup back at their original paths. Files that
+        exist there already are left alone unless ``overwrite`` is set.
+        """
+        with open(os.path.join(backup_dir, self.MANIFEST), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+
+        counts = {"restored": 0, "skipped": 0, "failed": 0}
+        for entry in manifest["files"]:
+            source = os.path.join(backup_dir, entry["path"])
+            target = os.path.join(manifest["source_dir"], entry["path"])
+            if os.path.exists(target) and not overwrite:
+                counts["skipped"] += 1
+                continue
+            try:
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                if os.path.exists(target):
+                    os.remove(target)
+                self._clone(source, target, os.stat(source).st_dev)
+                counts["restored"] += 1
+            except OSError as e:
+                counts["failed"] += 1
+                print(f"Could not restore {target}: {str(e)}")
+        return counts
@@ -0,0 +1,301 @@
+"""
+Headless entry point for servers and scheduled jobs.
+
+    python cli.py analyze <dir> [--output analysis.json]
+    python cli.py plan <dir> [--analysis analysis.json]
+    python cli.py apply <dir> [--analysis analysis.json] [--remove-empty]
+    python cli.py undo <dir> [--run RUN_ID] [--since 2024-05-01T09:00] [--until ...]
+    python cli.py restore <backup dir> [--overwrite]
+    python cli.py watch <dir> [--poll]
+
+Progress and per-file results are written to stdout as NDJSON, one event per
+line. The analyzers' debug output goes to stderr so stdout stays parseable.
+"""
+import os
+import sys
+import json
+import argparse
+import threading
+import contextlib
+from datetime import datetime
+from typing import Dict, Any
+from config_manager import ConfigManager
+from file_analyzer import FileAnalyzer
+from file_organizer import FileOrganizer
+from analysis_cache import AnalysisCache
+from folder_watcher import FolderWatcher
+
+DEFAULT_CONFIG = os.path.join(os.path.dirname(os.path.abspath(__file__)), "config.json")
+
+
+class NDJSONWriter:
+    """Thread-safe writer of one JSON event per line."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self._lock = threading.Lock()
+
+    def emit(self, event: str, **fields: Any) -> None:
+        line = json.dumps({"event": event, **fields}, ensure_ascii=False, default=str)
+        with self._lock:
+            self.stream.write(line + "\n")
+            self.stream.flush()
+
+
+def _create_analyzer(args, config_manager: ConfigManager) -> FileAnalyzer:
+    analyzer = FileAnalyzer(config_manager)
+    if args.no_cache:
+        analyzer.analysis_cache = None
+    elif args.cache_path:
+        settings = config_manager.get_setting("analysis_cache", {}) or {}
+        analyzer.analysis_cache = AnalysisCache(
+            args.cache_path,
+            max_entries=int(settings.get("max_entries", 200000)),
+            fingerprint_bytes=int(settings.get("fingerprint_bytes", 64 * 1024)),
+        )
+    return analyzer
+
+
+def _analyze(args, out: NDJSONWriter, config_manager: ConfigManager,
+             emit_results: bool) -> Dict[str, Any]:
+    analyzer = _create_analyzer(args, config_manager)
+
+    def on_progress(progress: float, status: str) -> None:
+        out.emit("progress", stage="analyze", progress=round(progress, 1), status=status)
+
+    def on_result(file_path: str, analysis: Dict[str, Any]) -> None:
+        out.emit("result", path=file_path, analysis=analysis)
+
+    try:
+        return analyzer.analyze_directory(
+            args.directory,
+            use_content=not args.no_content,
+            progress_callback=on_progress,
+            max_workers=args.workers,
+            result_callback=on_result if emit_results else None,
+        )
+    except KeyboardInterrupt:
+        analyzer.stop()
+        raise
+    finally:
+        analyzer.close()
+
+
+def _load_or_analyze(args, out: NDJSONWriter, config_manager: ConfigManager) -> Dict[str, Any]:
+    """Analysis results from --analysis, or a fresh analysis of the directory."""
+    if args.analysis:
+        with open(args.analysis, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return _analyze(args, out, config_manager, emit_results=False)
+
+
+def cmd_analyze(args, out: NDJSONWriter, config_manager: ConfigManager) -> int:
+    results = _analyze(args, out, config_manager, emit_results=True)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2, default=str)
+    failed = sum(1 for analysis in results.values()
+                 if not (analysis.get('content_analysis') or {}).get('success', True))
+    out.emit("summary", command="analyze", files=len(results), failed=failed, output=args.output)
+    return 0
+
+
+def cmd_plan(args, out: NDJSONWriter, config_manager: ConfigManager) -> int:
+    results = _load_or_analyze(args, out, config_manager)
+    organizer = FileOrganizer(config_manager)
+    entries = organizer.plan_moves(args.directory, results)
+    counts = {}
+    for entry in entries:
+        out.emit("plan", source=entry["source"], target=entry["target"], category=entry["category"],
+                 subcategory=entry["subcategory"], renamed=entry["renamed"])
+        counts[entry["category"]] = counts.get(entry["category"], 0) + 1
+    out.emit("summary", command="plan", files=len(entries), categories=counts)
+    return 0
+
+
+def cmd_apply(args, out: NDJSONWriter, config_manager: ConfigManager) -> int:
+    results = _load_or_analyze(args, out, config_manager)
+    organizer = FileOrganizer(config_manager)
+
+    def on_progress(progress: float, status: str) -> None:
+        out.emit("progress", stage="apply", progress=round(progress, 1), status=status)
+
+    try:
+        organizer.organize_files(args.directory, results, remove_empty=args.remove_empty,
+                                 progress_callback=on_progress)
+    except KeyboardInterrupt:
+        organizer.stop()
+        raise
+    finally:
+        if organizer.journal:
+            organizer.journal.close()
+
+    for operation in organizer.get_undo_history():
+        out.emit("moved", source=operation["original"]["path"], destination=operation["new"]["path"])
+    stats = organizer.get_stats()
+    journal = organizer.journal
+    out.emit("summary", command="apply", run=journal.run_id if journal else None,
+             journal=journal.path if journal else None, **stats)
+    return 1 if stats["failed"] else 0
+
+
+def timestamp(value: str) -> float:
+    """argparse type for ISO 8601 times, as epoch seconds"""
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"not an ISO 8601 time: {value}")
+
+
+def cmd_undo(args, out: NDJSONWriter, config_manager: ConfigManager) -> int:
+    organizer = FileOrganizer(config_manager)
+    organizer.source_dir = args.directory
+    if not organizer.open_run(args.run, source_dir=args.directory):
+        out.emit("error", message=f"No journaled run found for {args.directory}"
+                                  + (f" with id {args.run}" if args.run else ""))
+        return 1
+
+    def on_progress(progress: float, status: str) -> None:
+        out.emit("progress", stage="undo", progress=round(progress, 1), status=status)
+
+    def on_restored(source: str, destination: str) -> None:
+        out.emit("restored", source=source, destination=destination)
+
+    try:
+        counts = organizer.rollback(run_id=args.run, since=args.since, until=args.until,
+                                    progress_callback=on_progress, result_callback=on_restored)
+    except KeyboardInterrupt:
+        organizer.stop()
+        raise
+    finally:
+        organizer.journal.close()
+    run = organizer.journal.run_id if args.since is None and args.until is None else args.run
+    out.emit("summary", command="undo", run=run, **counts)
+    return 1 if counts["remaining"] else 0
+
+
+def cmd_restore(args, out: NDJSONWriter, config_manager: ConfigManager) -> int:
+    organizer = FileOrganizer(config_manager)
+    try:
+        counts = organizer.restore_backup(args.directory, overwrite=args.overwrite)
+    except FileNotFoundError:
+        out.emit("error", message=f"No backup manifest found in {args.directory}")
+        return 1
+    out.emit("summary", command="restore", **counts)
+    return 1 if counts["failed"] else 0
+
+
+def cmd_watch(args, out: NDJSONWriter, config_manager: ConfigManager) -> int:
+    organizer = FileOrganizer(config_manager)
+
+    def on_organized(file_path: str, analysis: Dict[str, Any], entry: Dict[str, Any]) -> None:
+        out.emit("organized", source=file_path, destination=entry["target"], category=entry["category"],
+                 subcategory=entry["subcategory"], renamed=entry["renamed"])
+
+    analyzer = _create_analyzer(args, config_manager)
+    watcher = FolderWatcher.from_config(args.directory, analyzer, organizer, config_manager,
+                                        use_content=not args.no_content, result_callback=on_organized)
+    if args.poll:
+        watcher.settings["use_polling"] = True
+
+    thread = threading.Thread(target=watcher.run, daemon=True)
+    thread.start()
+    while watcher.mode is None and thread.is_alive():
+        thread.join(0.05)
+    out.emit("watching", directory=args.directory, mode=watcher.mode,
+             run=organizer.journal.run_id if organizer.journal else None)
+    try:
+        # Batches run on the watcher thread; the main thread only waits for Ctrl-C
+        while thread.is_alive():
+            thread.join(0.5)
+    except KeyboardInterrupt:
+        watcher.stop()
+        thread.join()
+    finally:
+        analyzer.close()
+    stats = watcher.get_stats()
+    out.emit("summary", command="watch", run=organizer.journal.run_id if organizer.journal else None, **stats)
+    return 1 if stats["failed"] else 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Organize files into PARA folders without the GUI.")
+    parser.add_argument("--config", default=DEFAULT_CONFIG, help="path to config.json")
+    parser.add_argument("--quiet", action="store_true", help="discard debug output instead of writing it to stderr")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    def add_analysis_options(sub):
+        sub.add_argument("--workers", type=int, default=None,
+                         help="concurrent LLM requests (default: analysis_concurrency.max_workers)")
+        sub.add_argument("--no-content", action="store_true", help="skip LLM content analysis")
+        sub.add_argument("--no-cache", action="store_true", help="do not read or write the analysis cache")
+        sub.add_argument("--cache-path", help="analysis cache database to use instead of the configured one")
+
+    analyze = subparsers.add_parser("analyze", help="analyze files and stream results")
+    analyze.add_argument("directory")
+    analyze.add_argument("--output", help="also write all results to this JSON file")
+    add_analysis_options(analyze)
+    analyze.set_defaults(handler=cmd_analyze)
+
+    plan = subparsers.add_parser("plan", help="show where each file would be moved")
+    plan.add_argument("directory")
+    plan.add_argument("--analysis", help="results written by 'analyze --output' instead of analyzing again")
+    add_analysis_options(plan)
+    plan.set_defaults(handler=cmd_plan)
+
+    apply = subparsers.add_parser("apply", help="move files into PARA folders")
+    apply.add_argument("directory")
+    apply.add_argument("--analysis", help="results written by 'analyze --output' instead of analyzing again")
+    apply.add_argument("--remove-empty", action="store_true", help="remove the folders the moves left empty")
+    add_analysis_options(apply)
+    apply.set_defaults(handler=cmd_apply)
+
+    undo = subparsers.add_parser("undo", help="move files back using the journal of the last apply")
+    undo.add_argument("directory")
+    undo.add_argument("--run", help="run id reported by apply (default: the latest run for the directory)")
+    undo.add_argument("--since", type=timestamp,
+                      help="only undo moves made at or after this ISO time; without --run, across all runs")
+    undo.add_argument("--until", type=timestamp, help="only undo moves made at or before this ISO time")
+    undo.set_defaults(handler=cmd_undo)
+
+    restore = subparsers.add_parser("restore", help="copy the files of a backup back to their original paths")
+    restore.add_argument("directory", help="backup directory created by apply (<directory>_backup_<time>)")
+    restore.add_argument("--overwrite", action="store_true", help="replace files that exist at the original path")
+    restore.set_defaults(handler=cmd_restore)
+
+    watch = subparsers.add_parser("watch", help="organize new files as they arrive, until interrupted")
+    watch.add_argument("directory")
+    watch.add_argument("--poll", action="store_true",
+                       help="scan the folder periodically instead of using file system events")
+    add_analysis_options(watch)
+    watch.set_defaults(handler=cmd_watch)
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    out = NDJSONWriter(sys.stdout)
+    if not os.path.isdir(args.directory):
+        out.emit("error", message=f"Not a directory: {args.directory}")
+        return 2
+    # Absolute paths keep results and journals valid from any working directory
+    args.directory = os.path.abspath(args.directory)
+
+    debug_stream = open(os.devnull, 'w') if args.quiet else sys.stderr
+    try:
+        with contextlib.redirect_stdout(debug_stream):
+            config_manager = ConfigManager(args.config)
+            return args.handler(args, out, config_manager)
+    except KeyboardInterrupt:
+        out.emit("error", message="Interrupted")
+        return 130
+    except Exception as e:
+        out.emit("error", message=str(e))
+        return 1
+    finally:
+        if args.quiet:
+            debug_stream.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
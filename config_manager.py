@@ -48,10 +48,102 @@ class ConfigManager:
                         "app_name": "",
                         "default_model": "openai/gpt-3.5-turbo"
                     }
+                },
+                "http": {
+                    "pool_size": 8,
+                    "connect_timeout": 5,
+                    "read_timeout": 60,
+                    "keep_alive": True
+                },
+                "rate_limits": {
+                    "requests_per_second": 0,
+                    "tokens_per_minute": 0,
+                    "max_concurrency": 8,
+                    "min_concurrency": 1,
+                    "max_retries": 3,
+                    "backoff_seconds": 1,
+                    "max_backoff_seconds": 30,
+                    "latency_target_ms": 0
+                },
+                "structured_output": False,
+                "streaming": {
+                    "enabled": False
+                },
+                "routing": {
+                    "enabled": False,
+                    "providers": [],
+                    "failure_threshold": 3,
+                    "reset_timeout": 30,
+                    "latency_window": 50,
+                    "probe_interval": 0
+                },
+                "hedging": {
+                    "enabled": False,
+                    "percentile": 95,
+                    "budget": 0.05,
+                    "min_samples": 20,
+                    "min_delay_ms": 500,
+                    "secondary_provider": ""
+                },
+                "response_cache": {
+                    "enabled": True,
+                    "memory_entries": 1000,
+                    "disk_enabled": False,
+                    "disk_path": "",
+                    "ttl_seconds": 604800
                 }
             },
+            "analysis_cache": {
+                "enabled": True,
+                "path": "",
+                "max_entries": 200000,
+                "fingerprint_bytes": 65536
+            },
+            "analysis_concurrency": {
+                "max_workers": 4
+            },
+            "llm_batching": {
+                "enabled": False,
+                "token_budget": 3000,
+                "max_files": 10,
+                "max_file_tokens": 600
+            },
+            "extractors": {
+                "enabled": True,
+                "max_cost": "medium",
+                "disabled": []
+            },
+            "document_text": {
+                "enabled": True,
+                "max_workers": 0,
+                "timeout": 20,
+                "memory_limit_mb": 1024,
+                "max_pages": 5,
+                "max_file_size_mb": 100
+            },
+            "transfer": {
+                "chunk_size_mb": 64,
+                "max_workers": 4,
+                "verify": True
+            },
+            "journal": {
+                "enabled": True,
+                "path": "",
+                "sync_every": 100,
+                "sync_interval": 1.0,
+                "keep_runs": 50,
+                "rollback_workers": 8
+            },
+            "watch": {
+                "debounce_seconds": 2.0,
+                "stable_seconds": 2.0,
+                "batch_size": 20,
+                "poll_interval": 5.0,
+                "use_polling": False
+            },
             "max_file_size_mb": 1,
             "backup_enabled": False,
+            "backup_mode": "manifest",
             "date_organization_enabled": False,
             "remove_empty_folders": True,
             "language": "english",
@@ -1,6 +1,15 @@
 import os
+import time
+import socket
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 from typing import Dict, Any, Optional
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
 import json
 from pathlib import Path
 import mimetypes
@@ -8,6 +17,377 @@ import magic
 import langdetect
 import re
 from korean_utils import KoreanTextHandler
+from rate_control import RateController, THROTTLE_STATUS_CODES
+from provider_router import ProviderRouter, LatencyWindow
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate: ~4 ASCII characters per token, one token per other character."""
+    ascii_chars = sum(1 for c in text if ord(c) < 128)
+    return ascii_chars // 4 + (len(text) - ascii_chars) + 1
+
+
+class _TimedHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter whose pools report how long each new connection took to set up."""
+
+    def __init__(self, stats_callback, **kwargs):
+        self._stats_callback = stats_callback
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": self._timed_pool_class(HTTPConnectionPool),
+            "https": self._timed_pool_class(HTTPSConnectionPool),
+        }
+
+    def _timed_pool_class(self, pool_class):
+        callback = self._stats_callback
+
+        class TimedConnection(pool_class.ConnectionCls):
+            def connect(self):
+                started = time.perf_counter()
+                try:
+                    return super().connect()
+                finally:
+                    callback(time.perf_counter() - started)
+
+        return type(f"Timed{pool_class.__name__}", (pool_class,), {"ConnectionCls": TimedConnection})
+
+
+class ProviderClient:
+    """Pooled keep-alive HTTP session for one LLM provider."""
+
+    DEFAULT_SETTINGS = {
+        "pool_size": 8,
+        "connect_timeout": 5.0,
+        "read_timeout": 60.0,
+        "keep_alive": True
+    }
+
+    def __init__(self, name: str, settings: Dict[str, Any] = None,
+                 rate_controller: Optional[RateController] = None):
+        self.name = name
+        self.settings = {**self.DEFAULT_SETTINGS, **(settings or {})}
+        self.rate_controller = rate_controller
+        self.timeout = (float(self.settings["connect_timeout"]), float(self.settings["read_timeout"]))
+        self._lock = threading.Lock()
+        self.stats = {
+            "requests": 0,
+            "failures": 0,
+            "connections_opened": 0,
+            "connect_time_total": 0.0,
+            "request_time_total": 0.0
+        }
+
+        pool_size = int(self.settings["pool_size"])
+        self.session = requests.Session()
+        adapter = _TimedHTTPAdapter(self._record_connect, pool_connections=1,
+                                    pool_maxsize=pool_size, pool_block=True)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        if not self.settings["keep_alive"]:
+            self.session.headers["Connection"] = "close"
+
+    def _record_connect(self, elapsed: float) -> None:
+        with self._lock:
+            self.stats["connections_opened"] += 1
+            self.stats["connect_time_total"] += elapsed
+
+    def post(self, url: str, estimated_tokens: int = 0, **kwargs) -> requests.Response:
+        """
+        POST through the pooled session with the client's connect/read timeouts,
+        admitted by the rate controller when one is attached. A streamed
+        response holds its rate-control slot until it is closed, so callers
+        must close it.
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        if self.rate_controller:
+            return self.rate_controller.call(lambda: self._send(url, **kwargs), estimated_tokens,
+                                             stream=bool(kwargs.get("stream")))
+        return self._send(url, **kwargs)
+
+    def _send(self, url: str, **kwargs) -> requests.Response:
+        started = time.perf_counter()
+        try:
+            return self.session.post(url, **kwargs)
+        except requests.exceptions.RequestException:
+            with self._lock:
+                self.stats["failures"] += 1
+            raise
+        finally:
+            with self._lock:
+                self.stats["requests"] += 1
+                self.stats["request_time_total"] += time.perf_counter() - started
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Request counts plus average connection setup and request latency in milliseconds."""
+        with self._lock:
+            stats = self.stats.copy()
+        stats["avg_connect_ms"] = (stats["connect_time_total"] / stats["connections_opened"] * 1000
+                                   if stats["connections_opened"] else 0.0)
+        stats["avg_request_ms"] = (stats["request_time_total"] / stats["requests"] * 1000
+                                   if stats["requests"] else 0.0)
+        stats["connection_reuse_ratio"] = (1 - stats["connections_opened"] / stats["requests"]
+                                           if stats["requests"] else 0.0)
+        if self.rate_controller:
+            stats["rate_control"] = self.rate_controller.get_stats()
+        return stats
+
+    def close(self) -> None:
+        self.session.close()
+
+
+class LLMResponseCache:
+    """
+    Two-tier cache of LLM responses keyed by provider, model, generation options
+    and a hash of the exact prompt. The memory tier is an LRU; the optional disk
+    tier is a SQLite table whose entries expire after ``ttl_seconds``.
+    Concurrent lookups of the same key wait for the first caller's request
+    instead of issuing their own.
+    """
+
+    DEFAULT_FILENAME = "llm_response_cache.sqlite3"
+
+    def __init__(self, memory_entries: int = 1000, disk_path: Optional[str] = None,
+                 ttl_seconds: float = 7 * 24 * 3600):
+        self.memory_entries = memory_entries
+        self.ttl_seconds = ttl_seconds
+        self._memory = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "memory_hits": 0, "disk_hits": 0, "coalesced": 0}
+
+        self._conn = None
+        if disk_path:
+            os.makedirs(os.path.dirname(os.path.abspath(disk_path)), exist_ok=True)
+            self._conn = sqlite3.connect(disk_path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_responses ("
+                "key TEXT PRIMARY KEY, response TEXT NOT NULL, created REAL NOT NULL)")
+            self._conn.execute("DELETE FROM llm_responses WHERE created < ?",
+                               (time.time() - self.ttl_seconds,))
+            self._conn.commit()
+
+    @classmethod
+    def from_config(cls, config_manager, settings: Dict[str, Any]) -> Optional["LLMResponseCache"]:
+        """Create the cache described by ``llm_config.response_cache``, or None if disabled."""
+        if not settings.get("enabled", True):
+            return None
+        disk_path = None
+        if settings.get("disk_enabled", False):
+            config_path = config_manager.config_path if config_manager else "config.json"
+            disk_path = settings.get("disk_path") or os.path.join(
+                os.path.dirname(os.path.abspath(config_path)), cls.DEFAULT_FILENAME)
+        try:
+            return cls(
+                memory_entries=int(settings.get("memory_entries", 1000)),
+                disk_path=disk_path,
+                ttl_seconds=float(settings.get("ttl_seconds", 7 * 24 * 3600)),
+            )
+        except (sqlite3.Error, OSError) as e:
+            print(f"LLM response disk cache disabled: {str(e)}")
+            return cls(memory_entries=int(settings.get("memory_entries", 1000)))
+
+    @staticmethod
+    def make_key(provider: str, model: str, options: Dict[str, Any], prompt: str) -> str:
+        prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        encoded = json.dumps([provider, model, options or {}, prompt_hash], sort_keys=True)
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+    def _lookup(self, key: str) -> Optional[str]:
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return self._memory[key]
+            if self._conn is None:
+                return None
+            row = self._conn.execute(
+                "SELECT response, created FROM llm_responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if row[1] < time.time() - self.ttl_seconds:
+                self._conn.execute("DELETE FROM llm_responses WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self.stats["disk_hits"] += 1
+            self._remember(key, row[0])
+            return row[0]
+
+    def _remember(self, key: str, response: str) -> None:
+        self._memory[key] = response
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def put(self, key: str, response: str) -> None:
+        with self._lock:
+            self._remember(key, response)
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO llm_responses (key, response, created) VALUES (?, ?, ?)",
+                    (key, response, time.time()))
+                self._conn.commit()
+
+    def _count(self, *names: str) -> None:
+        with self._lock:
+            for name in names:
+                self.stats[name] += 1
+
+    def get_or_compute(self, key: str, compute) -> Optional[str]:
+        """Return the cached response, or call ``compute`` once per key and cache a non-empty result."""
+        cached = self._lookup(key)
+        if cached is not None:
+            self._count("hits")
+            return cached
+
+        with self._lock:
+            event = self._inflight.get(key)
+            leader = event is None
+            if leader:
+                event = self._inflight[key] = threading.Event()
+
+        if not leader:
+            # Another thread is already asking the LLM the same thing
+            event.wait()
+            cached = self._lookup(key)
+            if cached is not None:
+                self._count("hits", "coalesced")
+                return cached
+
+        self._count("misses")
+        try:
+            response = compute()
+            if response:
+                self.put(key, response)
+            return response
+        finally:
+            if leader:
+                with self._lock:
+                    self._inflight.pop(key, None)
+                event.set()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit/miss counts and the overall hit rate"""
+        with self._lock:
+            stats = self.stats.copy()
+            stats["memory_entries"] = len(self._memory)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+
+class StreamMonitor:
+    """
+    Incremental completeness check for a streamed LLM response.
+
+    JSON responses are complete once the top-level value closes. Line-based
+    responses are complete once every label in ``labels`` has appeared on a
+    finished line. Anything the model generates after that point is not needed.
+    """
+
+    def __init__(self, json_mode: bool = False, labels: Optional[list] = None):
+        self.json_mode = json_mode
+        self.labels = set(label.lower() for label in (labels or []))
+        self.seen = set()
+        self.started = time.perf_counter()
+        self.first_field_at = None
+        self.complete = False
+        self._pending_line = ""
+        self._depth = 0
+        self._opened = False
+        self._in_string = False
+        self._escaped = False
+
+    def _field_arrived(self) -> None:
+        if self.first_field_at is None:
+            self.first_field_at = time.perf_counter() - self.started
+
+    def feed(self, chunk: str) -> bool:
+        """Consume the next piece of the response and return True once it is complete."""
+        if self.complete:
+            return True
+        if self.json_mode:
+            self._feed_json(chunk)
+        elif self.labels:
+            self._feed_lines(chunk)
+        return self.complete
+
+    def _feed_json(self, chunk: str) -> None:
+        for char in chunk:
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == '\\':
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in '{[':
+                self._depth += 1
+                self._opened = True
+            elif char in '}]' and self._opened:
+                self._depth -= 1
+                if self._depth == 0:
+                    self._field_arrived()
+                    self.complete = True
+                    return
+            elif char == ',' and self._depth == 1:
+                # A comma at the top level ends the first member
+                self._field_arrived()
+
+    def _feed_lines(self, chunk: str) -> None:
+        lines = (self._pending_line + chunk).split('\n')
+        self._pending_line = lines.pop()
+        for line in lines:
+            if ':' not in line:
+                continue
+            label = re.sub(r'\*\*|\*', '', line.split(':', 1)[0]).strip().lower()
+            if label in self.labels:
+                self.seen.add(label)
+                self._field_arrived()
+        if self.seen >= self.labels:
+            self.complete = True
+
+
+class _HedgedAttempt:
+    """One of the racing copies of a hedged request; cancelling it closes its response."""
+
+    def __init__(self, provider: str):
+        self.provider = provider
+        self.cancelled = False
+        self._response = None
+        self._lock = threading.Lock()
+
+    def attach(self, response: requests.Response) -> None:
+        with self._lock:
+            self._response = response
+            cancelled = self.cancelled
+        if cancelled:
+            self._abort(response)
+
+    def cancel(self) -> None:
+        with self._lock:
+            self.cancelled = True
+            response = self._response
+        if response is not None:
+            self._abort(response)
+
+    @staticmethod
+    def _abort(response: requests.Response) -> None:
+        """
+        Shut the socket down so the loser's pending read fails right away;
+        close() alone would wait for the reader to release the buffer lock.
+        """
+        connection = getattr(response.raw, 'connection', None) or getattr(response.raw, '_connection', None)
+        sock = getattr(connection, 'sock', None)
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
 
 class ContentAnalyzer:
     """Analyzes file content and suggests appropriate names using LLM."""
@@ -36,6 +416,16 @@ class ContentAnalyzer:
             }
         }
         self.model_configs = {}
+        self.http_settings = {}
+        self.rate_limits = {}
+        self.router = None
+        routing_settings = {}
+        self.hedging = {}
+        self.structured_output = False
+        self.streaming = {}
+        self._clients = {}
+        self._clients_lock = threading.Lock()
+        response_cache_settings = {}
         
         if config_manager:
             # Load content analysis config
@@ -53,6 +443,13 @@ class ContentAnalyzer:
                         self.providers_config[provider] = config
                 
                 self.model_configs = llm_config.get("model_configs", {})
+                self.http_settings = llm_config.get("http", {})
+                self.rate_limits = llm_config.get("rate_limits", {})
+                self.structured_output = llm_config.get("structured_output", False)
+                self.streaming = llm_config.get("streaming", {})
+                routing_settings = llm_config.get("routing", {})
+                self.hedging = llm_config.get("hedging", {})
+                response_cache_settings = llm_config.get("response_cache", {})
                 
                 # Log current LLM configuration
                 print("\nLLM Configuration:")
@@ -67,6 +464,170 @@ class ContentAnalyzer:
                         print(f"- API Key: {key_status}")
                 print()
         
+        self.response_cache = LLMResponseCache.from_config(config_manager, response_cache_settings)
+        if routing_settings.get("enabled"):
+            self.router = self._create_router(routing_settings)
+        
+        self._attempt_local = threading.local()
+        self._hedge_lock = threading.Lock()
+        self._hedge_latency = {}
+        self._hedge_executor = None
+        self._hedge_pool_size = 0
+        # Analysis workers that may issue requests at once; sizes the hedge pool
+        self.max_workers = 1
+        if config_manager:
+            concurrency = config_manager.get_setting("analysis_concurrency", {}) or {}
+            self.max_workers = max(1, int(concurrency.get("max_workers", 1)))
+        self.hedge_stats = {"requests": 0, "hedged": 0, "hedge_wins": 0, "budget_exhausted": 0}
+        self._stream_lock = threading.Lock()
+        self.stream_stats = {
+            "streams": 0,
+            "early_stops": 0,
+            "chunks_received": 0,
+            "first_field_count": 0,
+            "first_field_time_total": 0.0,
+            "full_streams": 0,
+            "full_stream_chunks": 0,
+            "chunks_saved_estimate": 0
+        }
+        
+    def _create_router(self, settings: Dict[str, Any]) -> ProviderRouter:
+        """Route over the listed providers, or the default provider followed by the other configured ones."""
+        providers = settings.get("providers") or \
+            [self.provider] + [name for name in self.providers_config if name != self.provider]
+        providers = [name for name in providers if name in self.providers_config]
+        print(f"- Provider routing: {providers}")
+        return ProviderRouter(providers, settings,
+                              probe=lambda name: self.test_llm_provider(name).get('success', False))
+
+    def _get_client(self, provider: str) -> ProviderClient:
+        """Get the pooled HTTP client for a provider, creating it on first use."""
+        with self._clients_lock:
+            client = self._clients.get(provider)
+            if client is None:
+                provider_config = self.providers_config.get(provider, {})
+                settings = dict(self.http_settings)
+                for key in ProviderClient.DEFAULT_SETTINGS:
+                    if key in provider_config:
+                        settings[key] = provider_config[key]
+                rate_limits = {**self.rate_limits, **provider_config.get("rate_limits", {})}
+                client = ProviderClient(provider, settings,
+                                        RateController.from_settings(provider, rate_limits))
+                self._clients[provider] = client
+            return client
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get per-provider HTTP statistics"""
+        with self._clients_lock:
+            clients = list(self._clients.items())
+        stats = {"providers": {name: client.get_stats() for name, client in clients}}
+        if self.response_cache:
+            stats["response_cache"] = self.response_cache.get_stats()
+        if self.streaming.get("enabled"):
+            stats["streaming"] = self.get_stream_stats()
+        if self.router:
+            stats["routing"] = self.router.get_stats()
+        if self.hedging.get("enabled"):
+            with self._hedge_lock:
+                stats["hedging"] = self.hedge_stats.copy()
+        return stats
+
+    def get_stream_stats(self) -> Dict[str, Any]:
+        """
+        Streaming statistics. Tokens are counted as stream chunks (one token
+        per chunk for Ollama). The saved estimate compares early-stopped streams
+        with the average length of streams the model finished on its own.
+        """
+        with self._stream_lock:
+            stats = self.stream_stats.copy()
+        stats["avg_time_to_first_field_ms"] = (
+            stats["first_field_time_total"] / stats["first_field_count"] * 1000
+            if stats["first_field_count"] else 0.0)
+        stats["tokens_received"] = stats.pop("chunks_received")
+        stats["tokens_saved_estimate"] = stats.pop("chunks_saved_estimate")
+        return stats
+
+    def _record_stream(self, monitor: StreamMonitor, chunks: int, stopped_early: bool) -> None:
+        with self._stream_lock:
+            stats = self.stream_stats
+            stats["streams"] += 1
+            stats["chunks_received"] += chunks
+            if monitor.first_field_at is not None:
+                stats["first_field_count"] += 1
+                stats["first_field_time_total"] += monitor.first_field_at
+            if stopped_early:
+                stats["early_stops"] += 1
+                if stats["full_streams"]:
+                    average = stats["full_stream_chunks"] / stats["full_streams"]
+                    stats["chunks_saved_estimate"] += max(0, round(average) - chunks)
+            else:
+                stats["full_streams"] += 1
+                stats["full_stream_chunks"] += chunks
+
+    def _read_stream(self, response: requests.Response, options: Optional[Dict[str, Any]],
+                     parse_line) -> str:
+        """
+        Collect a streamed response, closing the connection as soon as every
+        required field has arrived. ``parse_line`` turns one raw line into
+        (text, done).
+        """
+        options = options or {}
+        monitor = StreamMonitor(json_mode=bool(options.get('json')), labels=options.get('fields'))
+        parts = []
+        chunks = 0
+        stopped_early = False
+        try:
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                text, done = parse_line(line)
+                if text:
+                    parts.append(text)
+                    chunks += 1
+                    if monitor.feed(text) and not done:
+                        stopped_early = True
+                        break
+                if done:
+                    break
+        finally:
+            # Closing mid-stream drops the connection, which stops generation server-side
+            response.close()
+
+        self._record_stream(monitor, chunks, stopped_early)
+        if stopped_early:
+            print(f"Debug - Stream complete after {chunks} chunks, closed early")  # Debug log
+        return ''.join(parts)
+
+    @staticmethod
+    def _ollama_stream_line(line: bytes):
+        event = json.loads(line)
+        if event.get('error'):
+            raise ValueError(event['error'])
+        return event.get('response', ''), bool(event.get('done'))
+
+    @staticmethod
+    def _openrouter_stream_line(line: bytes):
+        line = line.decode('utf-8', errors='replace')
+        # Server-sent events; lines starting with ':' are keep-alive comments
+        if not line.startswith('data:'):
+            return '', False
+        payload = line[5:].strip()
+        if payload == '[DONE]':
+            return '', True
+        event = json.loads(payload)
+        if event.get('error'):
+            raise ValueError(event['error'])
+        choices = event.get('choices') or [{}]
+        delta = choices[0].get('delta') or {}
+        return delta.get('content') or '', choices[0].get('finish_reason') is not None
+
+    def _ollama_endpoint(self, config: dict) -> str:
+        """Build the Ollama generate endpoint from a base URL or a full endpoint URL."""
+        base_url = config.get('url', 'http://localhost:11434').rstrip('/')
+        if base_url.endswith('/api/generate'):
+            return base_url
+        return f"{base_url}/api/generate"
+
     def analyze_for_rename(self, file_path: str, content_data: Dict[str, Any]) -> Dict[str, Any]:
         """Analyze content and suggest a name."""
         try:
@@ -222,8 +783,12 @@ class ContentAnalyzer:
         
         return prompt
         
-    def _query_llm(self, prompt: str) -> Optional[str]:
-        """Query the LLM using configured provider."""
+    def _query_llm(self, prompt: str, options: Optional[Dict[str, Any]] = None) -> Optional[str]:
+        """
+        Query the LLM, serving repeated prompts from the response cache. With
+        routing enabled, providers are tried fastest-healthy first and a failed
+        provider fails over to the next candidate.
+        """
         try:
             print("\nDebug - Starting LLM query with prompt:")
             print("=" * 50)
@@ -235,34 +800,21 @@ class ContentAnalyzer:
                 print("Error: No LLM provider configured")
                 return None
                 
-            provider_config = self.providers_config.get(self.provider)
-            if not provider_config:
-                print(f"Error: Configuration missing for provider {self.provider}")
+            providers = self.router.candidates() if self.router else [self.provider]
+            if not providers:
+                print("Error: No healthy LLM provider available")
                 return None
-                
-            # For OpenRouter, validate API key
-            if self.provider == "openrouter":
-                if not provider_config.get('api_key'):
-                    print("Error: OpenRouter API key not configured")
-                    return None
-                    
-            print(f"\nProvider status:")
-            print(f"- Active provider: {self.provider}")
-            print(f"- Model: {provider_config.get('default_model', 'not specified')}")
-            print(f"- API URL: {provider_config.get('url', 'not specified')}")
             
-            # Make the API call based on provider
-            if self.provider == "ollama":
-                print("\nUsing Ollama API")
-                return self._query_ollama(prompt, provider_config)
-            elif self.provider == "openrouter":
-                print("\nUsing OpenRouter API")
-                response = self._query_openrouter(prompt, provider_config)
-                print("\nDebug - OpenRouter Response:", response)  # Debug log
-                return response
-            else:
-                print(f"\nError: Unknown provider {self.provider}")
-                return None
+            for provider in providers:
+                provider_config = self._provider_ready(provider)
+                if provider_config is None:
+                    continue
+                response = self._query_cached(provider, provider_config, prompt, options)
+                if response is not None:
+                    return response
+                if self.router and provider != providers[-1]:
+                    print(f"Provider {provider} failed, failing over to the next provider")
+            return None
                 
         except Exception as e:
             print(f"\nError in _query_llm:")
@@ -272,6 +824,192 @@ class ContentAnalyzer:
                 print(f"- API request failed: {str(e)}")
             return None
 
+    def _provider_ready(self, provider: str) -> Optional[dict]:
+        """Return the provider's configuration if it can be queried, otherwise None."""
+        provider_config = self.providers_config.get(provider)
+        if not provider_config:
+            print(f"Error: Configuration missing for provider {provider}")
+            return None
+            
+        # For OpenRouter, validate API key
+        if provider == "openrouter":
+            if not provider_config.get('api_key'):
+                print("Error: OpenRouter API key not configured")
+                return None
+                
+        print(f"\nProvider status:")
+        print(f"- Active provider: {provider}")
+        print(f"- Model: {provider_config.get('default_model', 'not specified')}")
+        print(f"- API URL: {provider_config.get('url', 'not specified')}")
+        return provider_config
+
+    def _query_cached(self, provider: str, provider_config: dict, prompt: str,
+                      options: Optional[Dict[str, Any]] = None) -> Optional[str]:
+        """Query one provider through the response cache, reporting the outcome to the router."""
+        def compute():
+            if self.hedging.get("enabled"):
+                return self._query_hedged(provider, provider_config, prompt, options)
+            return self._run_attempt(None, provider, provider_config, prompt, options)
+        
+        if not self.response_cache:
+            return compute()
+        
+        cache_key = LLMResponseCache.make_key(
+            provider, provider_config.get('default_model'), options, prompt)
+        return self.response_cache.get_or_compute(cache_key, compute)
+
+    def _run_attempt(self, attempt: Optional[_HedgedAttempt], provider: str, provider_config: dict,
+                     prompt: str, options: Optional[Dict[str, Any]] = None) -> Optional[str]:
+        """
+        Send one request and feed its outcome to the router and the hedging
+        latency window. Only transport errors, timeouts, 5xx and 429 count
+        against the provider's health; a reply the provider rejected or that
+        could not be parsed does not.
+        """
+        # Claims a half-open provider's single trial request; another thread may hold it
+        if self.router and not self.router.acquire(provider):
+            print(f"Provider {provider} is recovering and already has a trial request in flight")
+            return None
+        self._attempt_local.attempt = attempt
+        self._attempt_local.healthy = None
+        started = time.perf_counter()
+        response = None
+        try:
+            response = self._query_provider(provider, prompt, provider_config, options)
+            return response
+        finally:
+            self._attempt_local.attempt = None
+            healthy = self._attempt_local.healthy
+            elapsed = time.perf_counter() - started
+            # A cancelled hedge loser says nothing about the provider's health;
+            # healthy is None when no request was sent (e.g. the provider is not configured)
+            recorded = (attempt is None or not attempt.cancelled) and healthy is not None
+            if self.router:
+                if recorded:
+                    self.router.record(provider, healthy, elapsed)
+                else:
+                    self.router.release(provider)
+            if attempt is None or not attempt.cancelled:
+                if response is not None and self.hedging.get("enabled"):
+                    with self._hedge_lock:
+                        window = self._hedge_latency.setdefault(provider, LatencyWindow(
+                            self.hedging.get("latency_window", 100)))
+                        window.add(elapsed)
+
+    def _track_response(self, response: requests.Response) -> None:
+        """Note the provider's health from the status and let a racing hedge cancel the response."""
+        self._attempt_local.healthy = (response.status_code < 500
+                                       and response.status_code not in THROTTLE_STATUS_CODES)
+        attempt = getattr(self._attempt_local, 'attempt', None)
+        if attempt is not None:
+            attempt.attach(response)
+
+    def _transport_failed(self, error: requests.exceptions.RequestException) -> None:
+        """Count a connection failure or timeout against the provider's health."""
+        # An HTTPError carries a status that _track_response has already judged
+        if not isinstance(error, requests.exceptions.HTTPError):
+            self._attempt_local.healthy = False
+
+    def _hedge_delay(self, provider: str) -> Optional[float]:
+        """Seconds to wait before hedging, or None while there are too few latency samples."""
+        with self._hedge_lock:
+            window = self._hedge_latency.get(provider)
+            if window is None or len(window.samples) < int(self.hedging.get("min_samples", 20)):
+                return None
+            delay = window.percentile(float(self.hedging.get("percentile", 95)))
+        return max(delay, float(self.hedging.get("min_delay_ms", 500)) / 1000)
+
+    def _take_hedge_budget(self) -> bool:
+        """Allow a hedge while hedges stay within ``budget`` (a fraction) of all requests."""
+        with self._hedge_lock:
+            budget = float(self.hedging.get("budget", 0.05))
+            if self.hedge_stats["hedged"] + 1 > budget * self.hedge_stats["requests"]:
+                self.hedge_stats["budget_exhausted"] += 1
+                return False
+            self.hedge_stats["hedged"] += 1
+            return True
+
+    def _hedge_target(self, provider: str) -> Optional[str]:
+        """
+        Provider for the duplicate request: the configured secondary, the next
+        routed one, or the same. A secondary whose circuit is open is skipped.
+        """
+        candidates = self.router.candidates() if self.router else None
+        secondary = self.hedging.get("secondary_provider")
+        if secondary and secondary != provider and (candidates is None or secondary in candidates):
+            return secondary if self._provider_ready(secondary) is not None else None
+        if candidates:
+            for candidate in candidates:
+                if candidate != provider and self._provider_ready(candidate) is not None:
+                    return candidate
+        return provider
+
+    def _query_hedged(self, provider: str, provider_config: dict, prompt: str,
+                      options: Optional[Dict[str, Any]] = None) -> Optional[str]:
+        """
+        Send the request and, if it is still running after the configured
+        percentile of recent latency, race a duplicate against it. The first
+        non-empty answer wins and the other request is cancelled.
+        """
+        with self._hedge_lock:
+            self.hedge_stats["requests"] += 1
+            # Each analysis worker waits on one primary and at most one hedge
+            pool_size = 2 * self.max_workers
+            if self._hedge_pool_size != pool_size:
+                if self._hedge_executor is not None:
+                    self._hedge_executor.shutdown(wait=False)
+                self._hedge_executor = ThreadPoolExecutor(max_workers=pool_size,
+                                                          thread_name_prefix="llm-hedge")
+                self._hedge_pool_size = pool_size
+        
+        delay = self._hedge_delay(provider)
+        if delay is None:
+            return self._run_attempt(None, provider, provider_config, prompt, options)
+        
+        attempts = {}
+        primary = _HedgedAttempt(provider)
+        attempts[self._hedge_executor.submit(
+            self._run_attempt, primary, provider, provider_config, prompt, options)] = primary
+        done, _ = wait(list(attempts), timeout=delay)
+        if not done and self._take_hedge_budget():
+            hedge_provider = self._hedge_target(provider)
+            if hedge_provider:
+                print(f"Hedging slow {provider} request (> {delay:.2f}s) with {hedge_provider}")
+                hedge = _HedgedAttempt(hedge_provider)
+                attempts[self._hedge_executor.submit(
+                    self._run_attempt, hedge, hedge_provider,
+                    self.providers_config[hedge_provider], prompt, options)] = hedge
+        
+        pending = set(attempts)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                response = future.result()
+                if response is None:
+                    continue
+                for other in pending:
+                    attempts[other].cancel()
+                if attempts[future] is not primary:
+                    with self._hedge_lock:
+                        self.hedge_stats["hedge_wins"] += 1
+                return response
+        return None
+
+    def _query_provider(self, provider: str, prompt: str, provider_config: dict,
+                        options: Optional[Dict[str, Any]] = None) -> Optional[str]:
+        """Make the API call based on provider."""
+        if provider == "ollama":
+            print("\nUsing Ollama API")
+            return self._query_ollama(prompt, provider_config, options)
+        elif provider == "openrouter":
+            print("\nUsing OpenRouter API")
+            response = self._query_openrouter(prompt, provider_config, options)
+            print("\nDebug - OpenRouter Response:", response)  # Debug log
+            return response
+        else:
+            print(f"\nError: Unknown provider {provider}")
+            return None
+
     def _get_model_config(self, model_name: str) -> dict:
         """Get model-specific configuration based on model name."""
         # Get default config from settings
@@ -289,33 +1027,49 @@ class ContentAnalyzer:
         
         return base_config
 
-    def _query_ollama(self, prompt: str, config: dict) -> Optional[str]:
-        """Query the Ollama API."""
+    def _query_ollama(self, prompt: str, config: dict,
+                      options: Optional[Dict[str, Any]] = None) -> Optional[str]:
+        """
+        Query the Ollama API. ``options={'json': True}`` requests a JSON response;
+        ``options={'fields': [...]}`` lists the labels that complete a streamed reply.
+        """
         try:
             # Construct the API endpoint
-            base_url = config.get('url', 'http://localhost:11434')
-            api_endpoint = f"{base_url}/api/generate"
+            api_endpoint = self._ollama_endpoint(config)
             
             # Get the model name
             model = config.get('default_model', 'gemma:2b')
             
             # Prepare the request
             headers = {'Content-Type': 'application/json'}
+            streaming = bool(self.streaming.get('enabled'))
             data = {
                 'model': model,
                 'prompt': prompt,
-                'stream': False
+                'stream': streaming
             }
+            if options and options.get('json'):
+                data['format'] = 'json'
             
             print(f"Querying Ollama with model: {model}")
             print(f"Using endpoint: {api_endpoint}")
             
             # Make the request
-            response = requests.post(api_endpoint, headers=headers, json=data)
-            response.raise_for_status()
-            
-            # Parse the response
-            result = response.json()
+            # A hedged attempt reads the body lazily so a faster duplicate can cancel it
+            hedged = getattr(self._attempt_local, 'attempt', None) is not None
+            response = self._get_client('ollama').post(api_endpoint, headers=headers, json=data,
+                                                       stream=streaming or hedged,
+                                                       estimated_tokens=estimate_tokens(prompt))
+            self._track_response(response)
+            # Closing releases the rate-control slot a streamed response holds
+            with response:
+                response.raise_for_status()
+                
+                if streaming:
+                    return self._read_stream(response, options, self._ollama_stream_line)
+                
+                # Parse the response
+                result = response.json()
             if 'response' in result:
                 return result['response']
             else:
@@ -323,6 +1077,7 @@ class ContentAnalyzer:
                 return None
                 
         except requests.exceptions.RequestException as e:
+            self._transport_failed(e)
             print(f"Error querying Ollama: {str(e)}")
             if "Connection refused" in str(e):
                 print("Make sure Ollama is running locally (http://localhost:11434)")
@@ -331,7 +1086,8 @@ class ContentAnalyzer:
             print(f"Unexpected error querying Ollama: {str(e)}")
             return None
 
-    def _query_openrouter(self, prompt: str, config: dict) -> Optional[str]:
+    def _query_openrouter(self, prompt: str, config: dict,
+                          options: Optional[Dict[str, Any]] = None) -> Optional[str]:
         """Query using OpenRouter API with enhanced error handling and model-specific configs."""
         try:
             if not config.get("configured", True):  # Default to True for backward compatibility
@@ -360,21 +1116,36 @@ class ContentAnalyzer:
                 "model": model,
                 "messages": [{"role": "user", "content": prompt}]
             }
+            if options and options.get('json'):
+                # OpenAI-compatible structured output
+                data["response_format"] = {"type": "json_object"}
             
-            response = requests.post(url, headers=headers, json=data, timeout=30)
+            streaming = bool(self.streaming.get('enabled'))
+            if streaming:
+                data["stream"] = True
             
-            if response.status_code != 200:
-                error_msg = f"OpenRouter API error (Status {response.status_code})"
-                try:
-                    error_data = response.json()
-                    if 'error' in error_data:
-                        error_msg += f": {error_data['error']}"
-                except:
-                    error_msg += f": {response.text}"
-                print(error_msg)
-                return None
+            client = self._get_client('openrouter')
+            hedged = getattr(self._attempt_local, 'attempt', None) is not None
+            response = client.post(url, headers=headers, json=data, stream=streaming or hedged,
+                                   estimated_tokens=estimate_tokens(prompt))
+            self._track_response(response)
+            # Closing releases the rate-control slot a streamed response holds
+            with response:
+                if response.status_code != 200:
+                    error_msg = f"OpenRouter API error (Status {response.status_code})"
+                    try:
+                        error_data = response.json()
+                        if 'error' in error_data:
+                            error_msg += f": {error_data['error']}"
+                    except:
+                        error_msg += f": {response.text}"
+                    print(error_msg)
+                    return None
                 
-            result = response.json()
+                if streaming:
+                    return self._read_stream(response, options, self._openrouter_stream_line).strip()
+                
+                result = response.json()
             if "choices" in result and result["choices"]:
                 content = result["choices"][0]["message"]["content"]
                 return content.strip()
@@ -383,9 +1154,10 @@ class ContentAnalyzer:
                 return None
                 
         except requests.exceptions.RequestException as e:
+            self._transport_failed(e)
             print(f"OpenRouter API request failed: {str(e)}")
             if isinstance(e, requests.exceptions.Timeout):
-                print("Request timed out after 30 seconds")
+                print(f"Request timed out (connect/read timeouts: {self._get_client('openrouter').timeout})")
             elif isinstance(e, requests.exceptions.ConnectionError):
                 print("Failed to connect to OpenRouter API")
             return None
@@ -436,9 +1208,10 @@ class ContentAnalyzer:
         test_prompt = "This is a test prompt. Please respond with 'ok' to verify the connection."
         
         try:
+            client = self._get_client(provider)
             if provider == "ollama":
-                response = requests.post(
-                    provider_config["url"],
+                response = client.post(
+                    self._ollama_endpoint(provider_config),
                     json={
                         'model': provider_config.get("default_model", "mistral"),
                         'prompt': test_prompt,
@@ -475,7 +1248,7 @@ class ContentAnalyzer:
                 if provider_config.get("app_name"):
                     headers["X-Title"] = provider_config["app_name"]
                     
-                response = requests.post(
+                response = client.post(
                     provider_config["url"],
                     headers=headers,
                     json={
@@ -0,0 +1,118 @@
+import codecs
+from typing import Dict, Any, Tuple, Optional
+from file_probe import FileProbe
+
+# Candidate encodings in order of preference; latin-1 accepts any byte sequence
+ENCODINGS = ['utf-8', 'cp949', 'euc-kr', 'iso-8859-1']
+
+_BOMS = [
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+]
+
+
+def detect_encoding(prefix: bytes) -> str:
+    """Pick the first candidate encoding that decodes the prefix cleanly."""
+    for bom, encoding in _BOMS:
+        if prefix.startswith(bom):
+            return encoding
+    for encoding in ENCODINGS:
+        # An incremental decoder tolerates a multi-byte character cut off at the end
+        decoder = codecs.getincrementaldecoder(encoding)()
+        try:
+            decoder.decode(prefix, final=False)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+    return ENCODINGS[-1]
+
+
+class ContentSample:
+    """
+    Decoded beginning of a file, sized for the prompt rather than the file.
+    ``encoding`` is None for text extracted from documents.
+    """
+
+    __slots__ = ('text', 'encoding', 'bytes_read', 'truncated')
+
+    def __init__(self, text: str, encoding: Optional[str], bytes_read: int, truncated: bool):
+        self.text = text
+        self.encoding = encoding
+        self.bytes_read = bytes_read
+        self.truncated = truncated
+
+
+class ContentReader:
+    """
+    Bounded access to file content: one byte read per file for the prompt
+    sample, encoding sniffed from a small prefix, and chunked newline counting
+    on raw bytes.
+    """
+
+    DETECT_BYTES = 4096
+    CHUNK_SIZE = 1024 * 1024
+
+    def __init__(self, sample_chars: int = 2000, line_count_max_bytes: int = 5 * 1024 * 1024):
+        self.sample_chars = sample_chars
+        # Worst case of four bytes per character (UTF-8)
+        self.sample_bytes = sample_chars * 4
+        self.line_count_max_bytes = line_count_max_bytes
+
+    @classmethod
+    def from_config(cls, content_config: Dict[str, Any]) -> "ContentReader":
+        return cls(
+            sample_chars=int(content_config.get("text_sample_length", 2000)),
+            line_count_max_bytes=int(content_config.get("line_count_max_bytes", 5 * 1024 * 1024)),
+        )
+
+    def _read_prefix(self, probe: FileProbe, size: int) -> bytes:
+        """Return the first ``size`` bytes, reusing the probe's header read when it suffices."""
+        if len(probe.header) >= size or probe.header_is_complete:
+            return probe.header[:size]
+        with open(probe.path, 'rb') as f:
+            return f.read(size)
+
+    def read_sample(self, probe: FileProbe) -> ContentSample:
+        """Read and decode just enough of the file for the prompt."""
+        data = self._read_prefix(probe, self.sample_bytes)
+        complete = len(data) >= probe.size
+        encoding = detect_encoding(data[:self.DETECT_BYTES])
+
+        decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+        text = decoder.decode(data, final=complete)
+        truncated = not complete or len(text) > self.sample_chars
+        return ContentSample(text[:self.sample_chars], encoding, len(data), truncated)
+
+    def count_lines(self, probe: FileProbe) -> Tuple[int, bool]:
+        """
+        Count lines on raw bytes in chunks. Files larger than line_count_max_bytes
+        get an estimate extrapolated from the counted prefix.
+        Returns (lines, estimated).
+        """
+        size = probe.size
+        if size == 0:
+            return 0, False
+
+        if probe.header_is_complete:
+            data = probe.header
+            return data.count(b'\n') + (0 if data.endswith(b'\n') else 1), False
+
+        limit = min(size, self.line_count_max_bytes)
+        newlines = 0
+        consumed = 0
+        last_byte = b''
+        with open(probe.path, 'rb') as f:
+            while consumed < limit:
+                chunk = f.read(min(self.CHUNK_SIZE, limit - consumed))
+                if not chunk:
+                    break
+                newlines += chunk.count(b'\n')
+                consumed += len(chunk)
+                last_byte = chunk[-1:]
+
+        if consumed >= size:
+            return newlines + (0 if last_byte == b'\n' else 1), False
+        if consumed == 0:
+            return 0, True
+        return max(1, round(newlines * size / consumed)), True
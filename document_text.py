@@ -0,0 +1,281 @@
+import os
+import time
+import signal
+import itertools
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, Future, CancelledError, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Any, Optional
+from content_reader import ContentSample
+from file_probe import FileProbe
+from office_sampler import sample_office_text, OFFICE_MIME_TYPES, OFFICE_EXTENSIONS
+
+PDF_MIME_TYPES = ['application/pdf']
+
+
+class ExtractionTimeout(Exception):
+    """Raised inside a worker when a document takes longer than the per-file timeout."""
+
+
+# Set in each worker: where it reports (task id, pid, start time) as it picks up a task
+_started_queue = None
+
+
+def _init_worker(memory_limit: int, started_queue=None) -> None:
+    """Cap the worker's address space so a pathological document fails with MemoryError."""
+    global _started_queue
+    _started_queue = started_queue
+    if memory_limit <= 0:
+        return
+    try:
+        import resource
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+    except (ImportError, ValueError, OSError):
+        # No rlimits on Windows; the parent-side deadline still applies
+        pass
+
+
+def _on_alarm(signum, frame):
+    raise ExtractionTimeout()
+
+
+def _pdf_text(path: str, max_pages: int, max_chars: int) -> str:
+    import PyPDF2
+    parts = []
+    length = 0
+    with open(path, 'rb') as f:
+        reader = PyPDF2.PdfReader(f)
+        for page in reader.pages[:max_pages]:
+            text = page.extract_text() or ''
+            parts.append(text)
+            length += len(text)
+            if length >= max_chars:
+                break
+    return '\n'.join(parts)
+
+
+def extract_document_text(path: str, limits: Dict[str, Any], task_id: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Worker entry point: text of the first pages of a PDF.
+    Returns {'text': ...} or {'error': ...}; never raises across the process boundary.
+    """
+    if _started_queue is not None and task_id is not None:
+        _started_queue.put((task_id, os.getpid(), time.time()))
+    timeout = float(limits.get('timeout', 0))
+    alarm = None
+    if timeout > 0:
+        try:
+            alarm = signal.signal(signal.SIGALRM, _on_alarm)
+            signal.setitimer(signal.ITIMER_REAL, timeout)
+        except (AttributeError, ValueError):
+            alarm = None
+    try:
+        return {'text': _pdf_text(path, int(limits['max_pages']), int(limits['max_chars']))}
+    except ExtractionTimeout:
+        return {'error': f"timed out after {timeout:g}s"}
+    except MemoryError:
+        return {'error': "memory limit exceeded"}
+    except Exception as e:
+        return {'error': f"{type(e).__name__}: {str(e)}"}
+    finally:
+        if alarm is not None:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, alarm)
+
+
+class DocumentTextReader:
+    """
+    Samples text from documents as ContentSamples, like plain-text reads.
+    PDFs are parsed in a process pool, so CPU-bound parsing runs on all cores
+    outside the GIL, with a hard timeout per file and a memory cap per worker.
+    Office files (OOXML and OpenDocument) are cheap to stream with
+    office_sampler and are read in-process.
+    """
+
+    DEFAULT_SETTINGS = {
+        "enabled": True,
+        "max_workers": 0,          # 0 uses the CPU count
+        "timeout": 20,
+        "memory_limit_mb": 1024,
+        "max_pages": 5,
+        "max_file_size_mb": 100
+    }
+
+    # Seconds past the worker's own timeout before a running task counts as hung
+    HANG_GRACE = 10
+    POLL_INTERVAL = 0.5
+
+    def __init__(self, settings: Dict[str, Any] = None, sample_chars: int = 2000):
+        self.settings = {**self.DEFAULT_SETTINGS, **(settings or {})}
+        self.enabled = bool(self.settings["enabled"])
+        self.sample_chars = sample_chars
+        self.timeout = float(self.settings["timeout"])
+        self.max_size = int(float(self.settings["max_file_size_mb"]) * 1024 * 1024)
+        self._executor = None
+        self._started_queue = None
+        self._started = {}      # task id -> (worker pid, start time)
+        self._task_ids = itertools.count()
+        self._lock = threading.Lock()
+        self.stats = {"documents": 0, "failures": 0, "timeouts": 0, "pool_restarts": 0, "resubmitted": 0}
+
+    @classmethod
+    def from_config(cls, config_manager, sample_chars: int = 2000) -> "DocumentTextReader":
+        settings = {}
+        if config_manager:
+            settings = config_manager.get_setting("document_text", {}) or {}
+        return cls(settings, sample_chars)
+
+    def kind(self, probe: FileProbe) -> Optional[str]:
+        """'pdf' or 'office' if this reader samples the file, otherwise None."""
+        if not self.enabled or probe.size > self.max_size:
+            return None
+        if probe.mime_type in PDF_MIME_TYPES or probe.extension == '.pdf':
+            return 'pdf'
+        if probe.mime_type in OFFICE_MIME_TYPES or probe.extension in OFFICE_EXTENSIONS:
+            return 'office'
+        return None
+
+    def uses_pool(self, probe: FileProbe) -> bool:
+        """Whether sampling the file goes through the process pool (submit/result)."""
+        return self.kind(probe) == 'pdf'
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                workers = int(self.settings["max_workers"]) or os.cpu_count() or 1
+                memory_limit = int(float(self.settings["memory_limit_mb"]) * 1024 * 1024)
+                # spawn: forking a process that runs HTTP and scanner threads is not safe
+                context = multiprocessing.get_context("spawn")
+                self._started_queue = context.SimpleQueue()
+                self._executor = ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=context,
+                    initializer=_init_worker,
+                    initargs=(memory_limit, self._started_queue),
+                )
+            return self._executor
+
+    def _start_time(self, task_id: int) -> Optional[tuple]:
+        """(pid, start time) of a task once a worker has picked it up."""
+        with self._lock:
+            queue = self._started_queue
+            while queue is not None and not queue.empty():
+                started_id, pid, started = queue.get()
+                self._started[started_id] = (pid, started)
+            return self._started.get(task_id)
+
+    def _kill_hung(self, future: Future, pid: int) -> None:
+        """
+        Kill the worker stuck on this task. The pool cannot replace a single
+        worker, so it is dropped; the other documents it was running are
+        resubmitted to a new pool by ``result``.
+        """
+        with self._lock:
+            if self._executor is future.executor:
+                self._executor = None
+                self.stats["pool_restarts"] += 1
+        try:
+            os.kill(pid, getattr(signal, 'SIGKILL', signal.SIGTERM))
+        except OSError:
+            pass
+        future.executor.shutdown(wait=False)
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self.stats[name] += 1
+
+    def submit(self, probe: FileProbe) -> Future:
+        """Start sampling in the pool without waiting for it."""
+        limits = {
+            'timeout': self.timeout,
+            'max_pages': self.settings["max_pages"],
+            'max_chars': self.sample_chars,
+        }
+        task_id = next(self._task_ids)
+        executor = self._get_executor()
+        future = executor.submit(extract_document_text, probe.path, limits, task_id)
+        # Remember the pool and task so a hung worker can be found and killed
+        future.executor = executor
+        future.task_id = task_id
+        return future
+
+    def _wait(self, future: Future) -> Optional[Dict[str, Any]]:
+        """
+        The worker's outcome, or None if it hung. The worker enforces the
+        timeout itself; the deadline here starts when a worker picks the task
+        up, so time spent queued behind other documents does not count.
+        """
+        while True:
+            try:
+                return future.result(timeout=self.POLL_INTERVAL)
+            except FutureTimeout:
+                started = self._start_time(future.task_id) if self.timeout > 0 else None
+                if started and time.time() - started[1] > self.timeout + self.HANG_GRACE:
+                    self._kill_hung(future, started[0])
+                    return None
+
+    def result(self, future: Future, probe: FileProbe, retried: bool = False) -> Optional[ContentSample]:
+        """Wait for a submitted sample; None if extraction failed or timed out."""
+        if not retried:
+            self._count("documents")
+        try:
+            outcome = self._wait(future)
+        except CancelledError:
+            # The pool was shut down by close()
+            return None
+        except BrokenProcessPool as e:
+            with self._lock:
+                if self._executor is future.executor:
+                    self._executor = None
+                    self.stats["pool_restarts"] += 1
+            if not retried:
+                # Lost along with another document's worker; run it once more in a fresh pool
+                self._count("resubmitted")
+                return self.result(self.submit(probe), probe, retried=True)
+            self._count("failures")
+            print(f"Document extraction worker died on {probe.path}: {str(e)}")
+            return None
+        finally:
+            # The start record is written before the result, so draining now leaves nothing behind
+            self._start_time(future.task_id)
+            with self._lock:
+                self._started.pop(future.task_id, None)
+
+        if outcome is None:
+            self._count("timeouts")
+            print(f"Document extraction stuck for {probe.path}, killed its worker")
+            return None
+        if 'error' in outcome:
+            self._count("timeouts" if outcome['error'].startswith('timed out') else "failures")
+            print(f"Document extraction failed for {probe.path}: {outcome['error']}")
+            return None
+        text = outcome['text']
+        return ContentSample(text[:self.sample_chars], None, probe.size, len(text) > self.sample_chars)
+
+    def read_sample(self, probe: FileProbe) -> Optional[ContentSample]:
+        if self.kind(probe) == 'office':
+            return self._read_office_sample(probe)
+        return self.result(self.submit(probe), probe)
+
+    def _read_office_sample(self, probe: FileProbe) -> Optional[ContentSample]:
+        self._count("documents")
+        try:
+            # One character past the sample tells whether the document was truncated
+            text = sample_office_text(probe.path, self.sample_chars + 1)
+        except Exception as e:
+            self._count("failures")
+            print(f"Document extraction failed for {probe.path}: {type(e).__name__}: {str(e)}")
+            return None
+        return ContentSample(text[:self.sample_chars], None, probe.size, len(text) > self.sample_chars)
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.stats)
+
+    def close(self) -> None:
+        """Shut the worker pool down; the next document starts a new one."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,227 @@
+import time
+import importlib
+import threading
+from typing import Dict, Any, Optional, Callable, List
+from file_probe import FileProbe
+from office_sampler import read_office_properties, OFFICE_MIME_TYPES, OFFICE_EXTENSIONS
+
+# Relative cost of running an extractor; files only pay for extractors up to the configured level
+COST_LEVELS = ['low', 'medium', 'high']
+
+
+class ExtractorUnavailable(Exception):
+    """The extractor's optional dependency is not installed on this system."""
+
+
+_modules = {}
+_modules_lock = threading.Lock()
+
+
+def lazy_import(module_name: str):
+    """Import a module the first time an extractor needs it."""
+    module = _modules.get(module_name)
+    if module is not None:
+        return module
+    with _modules_lock:
+        if module_name not in _modules:
+            try:
+                _modules[module_name] = importlib.import_module(module_name)
+            except ImportError as e:
+                raise ExtractorUnavailable(f"{module_name} is not available: {str(e)}")
+        return _modules[module_name]
+
+
+class Extractor:
+    """
+    Metadata extractor for a family of file types. ``func(probe)`` returns a
+    dict; ``max_size`` (bytes) skips files too large to be worth the cost.
+    """
+
+    def __init__(self, name: str, func: Callable[[FileProbe], Dict[str, Any]],
+                 mime_types: List[str] = None, extensions: List[str] = None,
+                 cost: str = 'low', max_size: Optional[int] = None):
+        self.name = name
+        self.func = func
+        self.mime_types = mime_types or []
+        self.extensions = extensions or []
+        self.cost = cost
+        self.max_size = max_size
+        self.unavailable = None
+
+    def accepts(self, probe: FileProbe) -> bool:
+        return self.max_size is None or probe.size <= self.max_size
+
+
+class ExtractorRegistry:
+    """
+    Extractors keyed by MIME type and extension. A file is dispatched to at
+    most one extractor, matched by MIME type first and extension second.
+    """
+
+    def __init__(self, max_cost: str = 'medium', disabled: List[str] = None):
+        self.max_cost = max_cost if max_cost in COST_LEVELS else 'medium'
+        self.disabled = set(disabled or [])
+        self._by_mime = {}
+        self._by_extension = {}
+        self._lock = threading.Lock()
+        self.stats = {}
+
+    @classmethod
+    def from_config(cls, config_manager) -> "ExtractorRegistry":
+        """Registry with the built-in extractors, limited by the ``extractors`` setting."""
+        settings = {}
+        if config_manager:
+            settings = config_manager.get_setting("extractors", {}) or {}
+        registry = cls(max_cost=settings.get("max_cost", "medium"),
+                       disabled=settings.get("disabled", []))
+        if settings.get("enabled", True):
+            for extractor in default_extractors():
+                registry.register(extractor)
+        return registry
+
+    def register(self, extractor: Extractor) -> None:
+        if extractor.name in self.disabled:
+            return
+        if COST_LEVELS.index(extractor.cost) > COST_LEVELS.index(self.max_cost):
+            return
+        for mime_type in extractor.mime_types:
+            self._by_mime[mime_type] = extractor
+        for extension in extractor.extensions:
+            self._by_extension[extension.lower()] = extractor
+        self.stats[extractor.name] = {"calls": 0, "failures": 0, "skipped_size": 0, "time_total": 0.0}
+
+    def find(self, probe: FileProbe) -> Optional[Extractor]:
+        extractor = self._by_mime.get(probe.mime_type) or self._by_extension.get(probe.extension)
+        if extractor is None or extractor.unavailable:
+            return None
+        return extractor
+
+    def signature(self) -> List[str]:
+        """Names of the active extractors, for cache invalidation."""
+        return sorted(self.stats)
+
+    def _count(self, name: str, key: str, amount: float = 1) -> None:
+        with self._lock:
+            self.stats[name][key] += amount
+
+    def extract(self, probe: FileProbe) -> Optional[Dict[str, Any]]:
+        """
+        Run the matching extractor and return {'extractor': name, 'data': {...}},
+        or None when no extractor applies.
+        """
+        extractor = self.find(probe)
+        if extractor is None:
+            return None
+        if not extractor.accepts(probe):
+            self._count(extractor.name, "skipped_size")
+            return None
+
+        started = time.perf_counter()
+        try:
+            data = extractor.func(probe)
+        except ExtractorUnavailable as e:
+            # Don't retry the import for every file
+            extractor.unavailable = str(e)
+            print(f"Extractor {extractor.name} disabled: {str(e)}")
+            return None
+        except Exception as e:
+            self._count(extractor.name, "failures")
+            print(f"Extractor {extractor.name} failed for {probe.path}: {str(e)}")
+            return None
+        finally:
+            self._count(extractor.name, "calls")
+            self._count(extractor.name, "time_total", time.perf_counter() - started)
+        return {'extractor': extractor.name, 'data': data}
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {name: dict(stats) for name, stats in self.stats.items()}
+
+
+def extract_pdf_metadata(probe: FileProbe) -> Dict[str, Any]:
+    """Document info and page count of a PDF"""
+    PyPDF2 = lazy_import('PyPDF2')
+    with open(probe.path, 'rb') as file:
+        reader = PyPDF2.PdfReader(file)
+        metadata = reader.metadata or {}
+        return {
+            "author": metadata.get('/Author', ''),
+            "creator": metadata.get('/Creator', ''),
+            "producer": metadata.get('/Producer', ''),
+            "subject": metadata.get('/Subject', ''),
+            "title": metadata.get('/Title', ''),
+            "pages": len(reader.pages)
+        }
+
+
+def extract_image_metadata(probe: FileProbe) -> Dict[str, Any]:
+    """EXIF tags and basic image info; PIL only reads the header here"""
+    Image = lazy_import('PIL.Image')
+    TAGS = lazy_import('PIL.ExifTags').TAGS
+    with Image.open(probe.path) as image:
+        metadata = {}
+        exif = image.getexif()
+        for tag_id in exif:
+            metadata[str(TAGS.get(tag_id, tag_id))] = str(exif.get(tag_id))
+        metadata.update({
+            "format": image.format,
+            "dimensions": list(image.size),
+            "mode": image.mode
+        })
+        return metadata
+
+
+def extract_email_metadata(probe: FileProbe) -> Dict[str, Any]:
+    """Headers of an RFC 822 message, parsed from the probe's header read"""
+    parser = lazy_import('email.parser')
+    msg = parser.BytesHeaderParser().parsebytes(probe.header)
+    return {
+        "subject": msg.get("subject", ""),
+        "from": msg.get("from", ""),
+        "to": msg.get("to", ""),
+        "date": msg.get("date", ""),
+        "message_id": msg.get("message-id", "")
+    }
+
+
+def extract_code_metadata(probe: FileProbe) -> Dict[str, Any]:
+    """Imports, classes and functions of a Python source file"""
+    with open(probe.path, 'r', encoding='utf-8', errors='replace') as file:
+        lines = [line.strip() for line in file]
+
+    return {
+        "has_main": any(line.startswith("def main") or line.startswith("if __name__ ==")
+                        for line in lines),
+        "imports": [line for line in lines if line.startswith(('import ', 'from '))],
+        "classes": [line.split('class ')[1].split(':')[0].split('(')[0].strip()
+                    for line in lines if line.startswith('class ')],
+        "functions": [line.split('def ')[1].split('(')[0].strip()
+                      for line in lines if line.startswith('def ')]
+    }
+
+
+def extract_office_metadata(probe: FileProbe) -> Dict[str, Any]:
+    """Document properties of OOXML and OpenDocument files, read from the zip container"""
+    return read_office_properties(probe.path)
+
+
+def default_extractors() -> List[Extractor]:
+    """The built-in extractors"""
+    return [
+        Extractor('pdf', extract_pdf_metadata,
+                  mime_types=['application/pdf'], extensions=['.pdf'],
+                  cost='medium', max_size=100 * 1024 * 1024),
+        Extractor('image', extract_image_metadata,
+                  mime_types=['image/jpeg', 'image/png', 'image/gif', 'image/bmp', 'image/tiff'],
+                  extensions=['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff'],
+                  cost='low', max_size=200 * 1024 * 1024),
+        Extractor('email', extract_email_metadata,
+                  mime_types=['message/rfc822'], extensions=['.eml'],
+                  cost='low'),
+        Extractor('code', extract_code_metadata,
+                  mime_types=['text/x-python', 'text/x-script.python'], extensions=['.py'],
+                  cost='low', max_size=1024 * 1024),
+        Extractor('office', extract_office_metadata,
+                  mime_types=OFFICE_MIME_TYPES, extensions=OFFICE_EXTENSIONS,
+                  cost='low', max_size=200 * 1024 * 1024),
+    ]
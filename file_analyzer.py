@@ -1,28 +1,109 @@
 import os
-import magic
 import json
-import requests
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, Any, Optional
 import threading
-import win32com.client
-from PIL import Image
-from PIL.ExifTags import TAGS
-import email
-import PyPDF2
-import docx
-import mimetypes
-import yaml
-from xml.etree import ElementTree
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 import re
-from content_analyzer import ContentAnalyzer
+from content_analyzer import ContentAnalyzer, estimate_tokens
+from file_scanner import DirectoryScanner
+from file_probe import FileProbe
+from content_reader import ContentReader
+from analysis_schema import (validate_analysis, parse_json_response, parse_analysis_text, ensure_fields,
+                             TEXT_FIELD_LABELS)
+from analysis_cache import AnalysisCache
+from extractors import ExtractorRegistry
+from document_text import DocumentTextReader
+
+PARA_ANALYSIS_PROMPT = """Analyze this file and provide:
+1. PARA category (Projects, Areas, Resources, Archives) with Korean translation
+2. Subcategory that best fits the content
+3. Confidence level (high, medium, low)
+4. Brief summary of the content
+5. Keywords (comma-separated)
+6. Suggest a descriptive filename (without extension) that reflects the content
+
+File: {name}
+Type: {mime_type}
+Content: {content}  # Limit content to first 2000 chars
+
+Format the response exactly like this:
+Category: **category_name (한글)**
+Subcategory: **subcategory_name (한글)**
+Confidence: **level**
+Summary: [brief summary]
+Keywords: [comma-separated keywords]
+Suggested name: [descriptive_filename_without_extension]
+"""
+
+PARA_JSON_PROMPT = """Analyze this file and provide:
+1. PARA category (Projects, Areas, Resources, Archives)
+2. Subcategory that best fits the content
+3. Confidence level (high, medium, low)
+4. Brief summary of the content
+5. Keywords
+6. Suggest a descriptive filename (without extension) that reflects the content
+
+File: {name}
+Type: {mime_type}
+Content:
+<<<
+{content}
+>>>
+
+Respond with ONLY a JSON object in this format:
+{{"category": "Projects", "subcategory": "active", "confidence": "high", "summary": "brief summary", "keywords": ["keyword1", "keyword2"], "suggested_name": "descriptive_filename_without_extension"}}
+"""
+
+PARA_BATCH_PROMPT = """Analyze each of the following {count} files and provide for each:
+1. PARA category (Projects, Areas, Resources, Archives)
+2. Subcategory that best fits the content
+3. Confidence level (high, medium, low)
+4. Brief summary of the content
+5. Keywords
+6. Suggest a descriptive filename (without extension) that reflects the content
+
+{files}
+Respond with ONLY a JSON object whose "results" array contains one object per file, in this format:
+{{"results": [{{"id": "F1", "category": "Projects", "subcategory": "active", "confidence": "high", "summary": "brief summary", "keywords": ["keyword1", "keyword2"], "suggested_name": "descriptive_filename_without_extension"}}]}}
+"""
+
+PARA_BATCH_FILE_BLOCK = """[id: {id}]
+File: {name}
+Type: {mime_type}
+Content:
+<<<
+{content}
+>>>
+"""
+
+RENAME_PROMPT = """Based on this content summary and keywords, suggest a clear and descriptive filename 
+            (without extension) that reflects the content. The name should be in {language}.
+            
+            Content Summary: {summary}
+            Keywords: {keywords}
+            Original Filename: {original_name}
+
+            Requirements for the filename:
+            1. Concise but descriptive (max 50 characters)
+            2. Must reflect the main purpose or content
+            3. If technical terms exist in keywords, include the most important one
+            4. Use underscores to separate words
+            5. No spaces or special characters except underscores
+            
+            Return ONLY the suggested filename, nothing else."""
 
 class FileAnalyzer:
     def __init__(self, config_manager=None):
         self.stop_flag = threading.Event()
         self.config_manager = config_manager
         self.content_analyzer = ContentAnalyzer(config_manager)
+        self.analysis_cache = AnalysisCache.from_config(config_manager)
+        self.content_reader = ContentReader.from_config(self.content_analyzer.content_config)
+        self.extractors = ExtractorRegistry.from_config(config_manager)
+        self.document_reader = DocumentTextReader.from_config(config_manager,
+                                                              self.content_reader.sample_chars)
         self.supported_extensions = {
             'documents': ['.txt', '.doc', '.docx', '.pdf', '.rtf', '.odt'],
             'images': ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff'],
@@ -33,94 +114,386 @@ class FileAnalyzer:
 
     def analyze_directory(self, directory: str, use_content: bool = True,
                          use_type: bool = True, use_date: bool = True,
-                         progress_callback=None) -> Dict[str, Any]:
+                         progress_callback=None, max_workers: Optional[int] = None,
+                         result_callback=None) -> Dict[str, Any]:
         """
-        Analyze all files in the directory and return analysis results
+        Analyze all files in the directory and return analysis results.
+        Files are streamed from a single scandir pass whose stat data is reused,
+        and the progress total grows as the scanner discovers files.
+        With more than one worker, LLM calls run concurrently while the local
+        stage (stat, type detection, reads) stays on the calling thread.
+        ``result_callback(file_path, analysis)`` is called as each file completes.
         """
         self.stop_flag.clear()
-        results = {}
+        if max_workers is None:
+            max_workers = self._get_max_workers()
+        # Hedged LLM requests run on a pool sized from the same worker count
+        self.content_analyzer.max_workers = max(1, max_workers)
+        
+        scanner = DirectoryScanner(directory, stop_flag=self.stop_flag)
         
-        # Count total files for progress tracking
-        total_files = sum([len(files) for _, _, files in os.walk(directory)])
+        if max_workers <= 1 and not self._get_batching_settings():
+            return self._analyze_sequential(scanner, use_content, use_type, use_date,
+                                            progress_callback, result_callback)
+        return self._analyze_concurrent(scanner, use_content, use_type, use_date,
+                                        progress_callback, max_workers, result_callback)
+
+    def _get_max_workers(self) -> int:
+        """Number of in-flight LLM requests from the ``analysis_concurrency`` setting."""
+        if not self.config_manager:
+            return 1
+        settings = self.config_manager.get_setting("analysis_concurrency", {}) or {}
+        return max(1, int(settings.get("max_workers", 1)))
+
+    def _report_progress(self, progress_callback, scanner: DirectoryScanner,
+                         file_path: str, processed_files: int) -> None:
+        """Report progress against the number of files discovered so far."""
+        if not progress_callback:
+            return
+        total_files = max(scanner.discovered, processed_files)
+        progress = (processed_files / total_files) * 100 if total_files else 100
+        total_text = f"{total_files}" if scanner.finished else f"{total_files}+"
+        status = f"Analyzing: {os.path.basename(file_path)} ({processed_files}/{total_text})"
+        progress_callback(progress, status)
+
+    def _analyze_sequential(self, scanner: DirectoryScanner, use_content: bool, use_type: bool,
+                            use_date: bool, progress_callback=None,
+                            result_callback=None) -> Dict[str, Any]:
+        """Analyze files one at a time on the calling thread."""
+        results = {}
         processed_files = 0
         
-        for root, _, files in os.walk(directory):
+        for record in scanner:
             if self.stop_flag.is_set():
                 break
                 
-            for file in files:
-                if self.stop_flag.is_set():
-                    break
-                    
-                file_path = os.path.join(root, file)
+            file_path = record.path
+            try:
+                results[file_path] = self.analyze_file(file_path, use_content, use_type, use_date,
+                                                       stats=record.stat)
+                if result_callback:
+                    result_callback(file_path, results[file_path])
+            except Exception as e:
+                print(f"Error analyzing {file_path}: {str(e)}")
+            processed_files += 1
+            self._report_progress(progress_callback, scanner, file_path, processed_files)
+        
+        if progress_callback:
+            progress_callback(100, "Analysis complete")
+        
+        return results
+
+    def _analyze_concurrent(self, scanner: DirectoryScanner, use_content: bool, use_type: bool,
+                            use_date: bool, progress_callback, max_workers: int,
+                            result_callback=None) -> Dict[str, Any]:
+        """
+        Run the local stage on the calling thread and the LLM stage on a bounded
+        thread pool. Small files are packed into batched prompts when
+        ``llm_batching`` is enabled. Results keep directory walk order regardless
+        of completion order.
+        """
+        order = []
+        completed = {}
+        pending = {}
+        processed_files = 0
+        batching = self._get_batching_settings()
+        batch = []
+        batch_tokens = 0
+
+        def collect(done) -> None:
+            nonlocal processed_files
+            for future in done:
+                jobs = pending.pop(future)
                 try:
-                    results[file_path] = self.analyze_file(file_path, use_content, use_type, use_date)
-                    processed_files += 1
-                    
-                    if progress_callback:
-                        progress = (processed_files / total_files) * 100
-                        status = f"Analyzing: {os.path.basename(file_path)} ({processed_files}/{total_files})"
-                        progress_callback(progress, status)
-                        
+                    analyses = future.result()
                 except Exception as e:
-                    print(f"Error analyzing {file_path}: {str(e)}")
+                    print(f"Error analyzing {', '.join(job['file_path'] for job in jobs)}: {str(e)}")
+                    analyses = [self._error_result(e) for _ in jobs]
+                for job, analysis in zip(jobs, analyses):
+                    completed[job['file_path']] = self._finish_analysis(job, analysis)
+                    if result_callback:
+                        result_callback(job['file_path'], completed[job['file_path']])
+                    processed_files += 1
+                    self._report_progress(progress_callback, scanner, job['file_path'], processed_files)
+
+        def submit(jobs) -> None:
+            # Bound the number of queued LLM requests so reads don't race far ahead
+            while len(pending) >= max_workers * 2 and not self.stop_flag.is_set():
+                done, _ = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+                collect(done)
+            if len(jobs) == 1:
+                future = executor.submit(lambda job: [self._run_llm_stage(job)], jobs[0])
+            else:
+                future = executor.submit(self._run_llm_batch, jobs)
+            pending[future] = jobs
+
+        executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm")
+        try:
+            for record in scanner:
+                if self.stop_flag.is_set():
+                    break
+                file_path = record.path
+                order.append(file_path)
+
+                job = self._prepare_analysis(file_path, use_content, use_type, use_date,
+                                             stats=record.stat)
+                if 'result' in job:
+                    completed[file_path] = job['result']
+                    if result_callback:
+                        result_callback(file_path, completed[file_path])
                     processed_files += 1
+                    self._report_progress(progress_callback, scanner, file_path, processed_files)
                     continue
-        
+
+                tokens = estimate_tokens(job.get('content') or '')
+                # Documents are still being parsed, so their size is unknown; send them alone
+                if not batching or 'content_future' in job or tokens > batching['max_file_tokens']:
+                    submit([job])
+                    continue
+
+                if batch and (batch_tokens + tokens > batching['token_budget']
+                              or len(batch) >= batching['max_files']):
+                    submit(batch)
+                    batch, batch_tokens = [], 0
+                batch.append(job)
+                batch_tokens += tokens
+
+            if batch and not self.stop_flag.is_set():
+                submit(batch)
+
+            while pending and not self.stop_flag.is_set():
+                done, _ = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+                collect(done)
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+            # Keep results of jobs that finished while shutting down
+            collect([future for future in pending if future.done() and not future.cancelled()])
+
         if progress_callback:
             progress_callback(100, "Analysis complete")
-        
-        return results
+
+        return {file_path: completed[file_path] for file_path in order if file_path in completed}
+
+    def _get_batching_settings(self) -> Optional[Dict[str, int]]:
+        """Batched prompt limits from the ``llm_batching`` setting, or None when disabled."""
+        if not self.config_manager:
+            return None
+        settings = self.config_manager.get_setting("llm_batching", {}) or {}
+        if not settings.get("enabled", False):
+            return None
+        return {
+            'token_budget': int(settings.get("token_budget", 3000)),
+            'max_files': int(settings.get("max_files", 10)),
+            'max_file_tokens': int(settings.get("max_file_tokens", 600)),
+        }
 
     def analyze_file(self, file_path: str, use_content: bool = True,
-                    use_type: bool = True, use_date: bool = True) -> Dict[str, Any]:
+                    use_type: bool = True, use_date: bool = True,
+                    stats: Optional[os.stat_result] = None) -> Dict[str, Any]:
+        job = self._prepare_analysis(file_path, use_content, use_type, use_date, stats=stats)
+        if 'result' in job:
+            return job['result']
         try:
+            return self._finish_analysis(job, self._run_llm_stage(job))
+        except Exception as e:
+            print(f"Error in analyze_file: {str(e)}")
+            return self._error_result(e)
+
+    def _prepare_analysis(self, file_path: str, use_content: bool = True,
+                          use_type: bool = True, use_date: bool = True,
+                          stats: Optional[os.stat_result] = None) -> Dict[str, Any]:
+        """
+        Local stage of the analysis: cache lookup, metadata and content reads.
+        Returns a job dict; a 'result' key means no LLM work is needed.
+        """
+        job = {'file_path': file_path, 'stats': stats, 'cache_context': None}
+        try:
+            # Stat once and reuse it for the cache lookup, metadata and size checks
+            if job['stats'] is None:
+                job['stats'] = os.stat(file_path)
+
+            # Serve unchanged files from the persistent cache before any other work
+            if self.analysis_cache:
+                job['cache_context'] = self._cache_context(use_content)
+                cached = self.analysis_cache.get(file_path, job['stats'], job['cache_context'])
+                if cached is not None:
+                    print(f"\nCache hit: {file_path}")
+                    job['result'] = cached
+                    return job
+
             print(f"\nAnalyzing file: {file_path}")
+            # Probe the file once; metadata, content checks and reads all share it
+            probe = job['probe'] = FileProbe.from_path(file_path, job['stats'])
+            
             # Get existing metadata and analysis
-            metadata = self._extract_metadata(file_path)
-            analysis = {'metadata': metadata}
+            metadata = self._extract_metadata(file_path, probe)
+            job['analysis'] = {'metadata': metadata}
             print(f"Metadata: {metadata}")
             
             # Add content analysis if requested and possible
-            if use_content and self._can_analyze_content(file_path):
-                print("Content analysis possible, proceeding...")
-                content_analysis = self._analyze_content(file_path, metadata)
-                print(f"Content analysis result: {content_analysis}")
-                
-                # If content analysis was successful, try to get a rename suggestion
-                if content_analysis.get('success'):
-                    if 'suggested_name' in content_analysis:
-                        print(f"Using existing suggested name: {content_analysis['suggested_name']}")
-                    else:
-                        # Generate smart rename suggestion if enabled
-                        if self.config_manager and self.config_manager.get_organization_rules().get('smart_rename_enabled', True):
-                            print("Smart rename enabled, generating suggestion...")
-                            rename_suggestion = self._suggest_rename(file_path, content_analysis)
-                            print(f"Rename suggestion: {rename_suggestion}")
-                            if rename_suggestion['success']:
-                                content_analysis['suggested_name'] = rename_suggestion['suggested_name']
-                                print(f"Added suggested name to content analysis: {rename_suggestion['suggested_name']}")
-                
-                analysis['content_analysis'] = content_analysis
+            can_analyze = use_content and self._can_analyze_content(file_path, probe)
+            if not can_analyze:
+                print(f"Content analysis skipped. use_content={use_content}, can_analyze={can_analyze}")
+                job['result'] = self._finish_analysis(job, job['analysis'])
+                return job
+
+            print("Content analysis possible, proceeding...")
+            if self.document_reader.uses_pool(probe):
+                # Parsed in the process pool; the LLM stage collects the sample
+                job['content_future'] = self.document_reader.submit(probe)
             else:
-                print(f"Content analysis skipped. use_content={use_content}, can_analyze={self._can_analyze_content(file_path)}")
-            
-            return analysis
+                job['content'] = self._get_file_content(file_path, probe)
+            return job
             
         except Exception as e:
             print(f"Error in analyze_file: {str(e)}")
-            return {
-                'error': str(e),
-                'metadata': {},
-                'content_analysis': {'success': False, 'error': str(e)}
-            }
+            job['result'] = self._error_result(e)
+            return job
+
+    def _run_llm_stage(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        """LLM stage of the analysis: PARA classification and rename suggestion."""
+        file_path = job['file_path']
+        analysis = job['analysis']
+        if 'content_future' in job:
+            sample = self.document_reader.result(job.pop('content_future'), job['probe'])
+            job['content'] = sample.text if sample else None
+            if not job['content']:
+                analysis['content_analysis'] = {'success': False, 'error': 'Could not extract document text'}
+                return analysis
+        content_analysis = self._analyze_content(file_path, analysis['metadata'], job.get('content'))
+        print(f"Content analysis result: {content_analysis}")
+        
+        # If content analysis was successful, try to get a rename suggestion
+        if content_analysis.get('success'):
+            if 'suggested_name' in content_analysis:
+                print(f"Using existing suggested name: {content_analysis['suggested_name']}")
+            else:
+                # Generate smart rename suggestion if enabled
+                if self.config_manager and self.config_manager.get_organization_rules().get('smart_rename_enabled', True):
+                    print("Smart rename enabled, generating suggestion...")
+                    rename_suggestion = self._suggest_rename(file_path, content_analysis)
+                    print(f"Rename suggestion: {rename_suggestion}")
+                    if rename_suggestion['success']:
+                        content_analysis['suggested_name'] = rename_suggestion['suggested_name']
+                        print(f"Added suggested name to content analysis: {rename_suggestion['suggested_name']}")
+        
+        analysis['content_analysis'] = content_analysis
+        return analysis
+
+    def _run_llm_batch(self, jobs: list) -> list:
+        """
+        Classify several small files with one prompt. Any file whose entry is
+        missing or malformed in the response falls back to a per-file request.
+        """
+        ids = [f"F{index + 1}" for index in range(len(jobs))]
+        blocks = []
+        for file_id, job in zip(ids, jobs):
+            metadata = job['analysis']['metadata']
+            blocks.append(PARA_BATCH_FILE_BLOCK.format(
+                id=file_id,
+                name=metadata.get('name', ''),
+                mime_type=metadata.get('mime_type', ''),
+                content=(job.get('content') or '')[:self.content_reader.sample_chars]
+            ))
+        prompt = PARA_BATCH_PROMPT.format(count=len(jobs), files='\n'.join(blocks))
+
+        response = self.content_analyzer._query_llm(prompt, {'json': True})
+        print(f"\nDebug - Batch LLM Response ({len(jobs)} files):", response)  # Debug log
+        items = self._parse_batch_response(response) if response else {}
+
+        analyses = []
+        for file_id, job in zip(ids, jobs):
+            item = items.get(file_id)
+            if item is None:
+                print(f"No batch result for {job['file_path']}, falling back to a single request")
+                analyses.append(self._run_llm_stage(job))
+                continue
+            job['analysis']['content_analysis'] = self._content_analysis_from_fields(item)
+            analyses.append(job['analysis'])
+        return analyses
+
+    def _parse_batch_response(self, response: str) -> Dict[str, Dict[str, Any]]:
+        """Extract the validated per-file results from a batch response, keyed by file ID."""
+        data = parse_json_response(response)
+        if isinstance(data, dict):
+            data = data.get('results')
+        if not isinstance(data, list):
+            print("Could not parse batch response")
+            return {}
+
+        items = {}
+        for item in data:
+            fields = validate_analysis(item)
+            if fields is not None and item.get('id'):
+                items[str(item['id']).strip()] = fields
+        return items
+
+    def _content_analysis_from_fields(self, fields: Dict[str, Any],
+                                      analysis_text: Optional[str] = None) -> Dict[str, Any]:
+        """Build a content analysis record from typed fields, rendering the text form if needed."""
+        if analysis_text is None:
+            analysis_text = (
+                f"Category: **{fields['category']}**\n"
+                f"Subcategory: **{fields['subcategory']}**\n"
+                f"Confidence: **{fields['confidence']}**\n"
+                f"Summary: {fields['summary']}\n"
+                f"Keywords: {', '.join(fields['keywords'])}\n"
+                f"Suggested name: {fields['suggested_name'] or ''}"
+            )
+        return {'success': True, 'analysis': analysis_text, **fields}
+
+    def _finish_analysis(self, job: Dict[str, Any], analysis: Dict[str, Any]) -> Dict[str, Any]:
+        """Store a completed analysis in the cache and return it."""
+        if self.analysis_cache and self._is_cacheable(analysis):
+            self.analysis_cache.put(job['file_path'], job['stats'], job['cache_context'], analysis)
+        return analysis
 
-    def _extract_metadata(self, file_path: str) -> Dict[str, Any]:
-        """Extract metadata from the file."""
+    def _error_result(self, error: Exception) -> Dict[str, Any]:
+        return {
+            'error': str(error),
+            'metadata': {},
+            'content_analysis': {'success': False, 'error': str(error)}
+        }
+
+    def _cache_context(self, use_content: bool) -> str:
+        """Build the cache context key from everything that shapes an analysis result."""
+        provider = self.content_analyzer.provider
+        provider_config = self.content_analyzer.providers_config.get(provider, {})
+        smart_rename = True
+        language = "korean"
+        if self.config_manager:
+            smart_rename = self.config_manager.get_organization_rules().get('smart_rename_enabled', True)
+            language = self.config_manager.get_setting("language", "korean")
+        return AnalysisCache.make_context(
+            provider=provider,
+            model=provider_config.get('default_model'),
+            prompt=PARA_ANALYSIS_PROMPT,
+            batch_prompt=PARA_BATCH_PROMPT + PARA_BATCH_FILE_BLOCK,
+            json_prompt=PARA_JSON_PROMPT,
+            structured_output=self.content_analyzer.structured_output,
+            rename_prompt=RENAME_PROMPT,
+            use_content=use_content,
+            smart_rename=smart_rename,
+            language=language,
+            text_sample_length=self.content_reader.sample_chars,
+            extractors=self.extractors.signature()
+        )
+
+    def _is_cacheable(self, analysis: Dict[str, Any]) -> bool:
+        """Only cache complete results so transient LLM failures are retried next run."""
+        if 'error' in analysis or 'error' in analysis.get('metadata', {}):
+            return False
+        content_analysis = analysis.get('content_analysis')
+        return content_analysis is None or bool(content_analysis.get('success'))
+
+    def _extract_metadata(self, file_path: str, probe: Optional[FileProbe] = None) -> Dict[str, Any]:
+        """Extract metadata from the file, reusing the probe when the caller has one."""
         try:
             # Convert path to Path object with proper encoding
             path = Path(file_path)
-            stats = path.stat()
+            if probe is None:
+                probe = FileProbe.from_path(file_path)
+            stats = probe.stat
             
             # Handle Korean filename
             try:
@@ -141,29 +514,24 @@ class FileAnalyzer:
                 'accessed': datetime.fromtimestamp(stats.st_atime).isoformat(),
             }
             
-            try:
-                # Use raw bytes for mime type detection
-                mime = magic.Magic(mime=True)
-                mime_type = mime.from_buffer(open(file_path, 'rb').read(2048))
-                metadata['mime_type'] = mime_type
-            except Exception as e:
-                metadata['mime_type'] = f"File type detection failed: {str(e)}"
+            metadata['mime_type'] = probe.mime_type
             
             # Count lines for text files
-            if self._is_text_file(path):
+            if probe.is_text:
                 try:
-                    # Try different encodings for text files
-                    encodings = ['utf-8', 'cp949', 'euc-kr']
-                    for encoding in encodings:
-                        try:
-                            with open(file_path, 'r', encoding=encoding) as f:
-                                metadata['size_lines'] = sum(1 for _ in f)
-                            break
-                        except UnicodeDecodeError:
-                            continue
+                    lines, estimated = self.content_reader.count_lines(probe)
+                    metadata['size_lines'] = lines
+                    if estimated:
+                        metadata['size_lines_estimated'] = True
                 except Exception:
                     metadata['size_lines'] = 0
             
+            # Type-specific metadata from the one extractor registered for this file type
+            extracted = self.extractors.extract(probe)
+            if extracted:
+                metadata['extractor'] = extracted['extractor']
+                metadata['extracted'] = extracted['data']
+            
             return metadata
             
         except Exception as e:
@@ -180,9 +548,6 @@ class FileAnalyzer:
                     'error': 'Content analysis failed'
                 }
                 
-            # Extract key information from content analysis
-            analysis_text = content_analysis.get('analysis', '')
-            
             # If content_analysis already has a suggested name, use it
             if 'suggested_name' in content_analysis:
                 return {
@@ -190,14 +555,10 @@ class FileAnalyzer:
                     'suggested_name': content_analysis['suggested_name']
                 }
             
-            # Parse summary and keywords
-            summary = ""
-            keywords = []
-            for line in analysis_text.split('\n'):
-                if line.startswith('Summary:'):
-                    summary = line.split(':', 1)[1].strip()
-                elif line.startswith('Keywords:'):
-                    keywords = [k.strip() for k in line.split(':', 1)[1].strip().split(',')]
+            # Read summary and keywords from the parsed analysis fields
+            ensure_fields(content_analysis)
+            summary = content_analysis.get('summary', '')
+            keywords = content_analysis.get('keywords', [])
                     
             # Get language setting from config
             language = "korean"
@@ -205,33 +566,18 @@ class FileAnalyzer:
                 language = self.config_manager.get_setting("language", "korean")
             
             # Create a more specific prompt for better name suggestions
-            prompt = f"""Based on this content summary and keywords, suggest a clear and descriptive filename 
-            (without extension) that reflects the content. The name should be in {language}.
-            
-            Content Summary: {summary}
-            Keywords: {', '.join(keywords)}
-            Original Filename: {os.path.splitext(os.path.basename(file_path))[0]}
-
-            Requirements for the filename:
-            1. Concise but descriptive (max 50 characters)
-            2. Must reflect the main purpose or content
-            3. If technical terms exist in keywords, include the most important one
-            4. Use underscores to separate words
-            5. No spaces or special characters except underscores
-            
-            Return ONLY the suggested filename, nothing else."""
-            
-            response = requests.post(
-                self.config_manager.get_llm_provider_config().get('url'),
-                json={
-                    "model": self.config_manager.get_llm_provider_config().get('model'),
-                    "prompt": prompt,
-                    "stream": False
-                }
+            prompt = RENAME_PROMPT.format(
+                language=language,
+                summary=summary,
+                keywords=', '.join(keywords),
+                original_name=os.path.splitext(os.path.basename(file_path))[0]
             )
             
-            if response.status_code == 200:
-                suggested_name = response.json()['response'].strip()
+            # Go through the ContentAnalyzer so the provider's pooled session is reused
+            response = self.content_analyzer._query_llm(prompt)
+            
+            if response:
+                suggested_name = response.strip()
                 
                 # Clean the suggested name
                 suggested_name = ''.join(c if c.isalnum() or c == '_' else '_' 
@@ -260,136 +606,28 @@ class FileAnalyzer:
                 'error': str(e)
             }
 
-    def _get_office_metadata(self, file_path: str) -> Dict[str, Any]:
-        """Extract metadata from Microsoft Office files"""
-        try:
-            app = win32com.client.Dispatch("Word.Application")
-            app.Visible = False
-            doc = app.Documents.Open(file_path)
-            
-            metadata = {
-                "author": doc.Author,
-                "title": doc.Title,
-                "subject": doc.Subject,
-                "keywords": doc.Keywords,
-                "last_author": doc.LastAuthor,
-                "revision": doc.Revisions.Count,
-                "comments": doc.Comments.Count
-            }
-            
-            doc.Close()
-            app.Quit()
-            return metadata
-        except:
-            return {}
-
-    def _get_pdf_metadata(self, file_path: str) -> Dict[str, Any]:
-        """Extract metadata from PDF files"""
-        try:
-            with open(file_path, 'rb') as file:
-                reader = PyPDF2.PdfReader(file)
-                metadata = reader.metadata
-                if metadata:
-                    return {
-                        "author": metadata.get('/Author', ''),
-                        "creator": metadata.get('/Creator', ''),
-                        "producer": metadata.get('/Producer', ''),
-                        "subject": metadata.get('/Subject', ''),
-                        "title": metadata.get('/Title', ''),
-                        "pages": len(reader.pages)
-                    }
-        except:
-            return {}
-        return {}
-
-    def _get_image_metadata(self, file_path: str) -> Dict[str, Any]:
-        """Extract EXIF metadata from image files"""
-        try:
-            image = Image.open(file_path)
-            exif = image.getexif()
-            
-            metadata = {}
-            if exif:
-                for tag_id in exif:
-                    tag = TAGS.get(tag_id, tag_id)
-                    data = exif.get(tag_id)
-                    metadata[tag] = str(data)
-            
-            # Add basic image info
-            metadata.update({
-                "format": image.format,
-                "size": image.size,
-                "mode": image.mode
-            })
-            return metadata
-        except:
-            return {}
-
-    def _get_email_metadata(self, file_path: str) -> Dict[str, Any]:
-        """Extract metadata from email files"""
-        try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                msg = email.message_from_file(file)
-                return {
-                    "subject": msg.get("subject", ""),
-                    "from": msg.get("from", ""),
-                    "to": msg.get("to", ""),
-                    "date": msg.get("date", ""),
-                    "message_id": msg.get("message-id", "")
-                }
-        except:
-            return {}
-
-    def _get_code_metadata(self, file_path: str) -> Dict[str, Any]:
-        """Extract metadata from code files"""
-        try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                content = file.read()
-                
-            metadata = {
-                "size_lines": len(content.splitlines()),
-                "has_main": "def main" in content or "if __name__ == '__main__'" in content,
-                "imports": [],
-                "classes": [],
-                "functions": []
-            }
-            
-            # Extract imports
-            import_lines = [line for line in content.splitlines() 
-                          if line.strip().startswith(('import ', 'from '))]
-            metadata["imports"] = import_lines
-            
-            # Basic class and function detection
-            metadata["classes"] = [line.split('class ')[1].split(':')[0].strip() 
-                                 for line in content.splitlines() 
-                                 if line.strip().startswith('class ')]
-            
-            metadata["functions"] = [line.split('def ')[1].split('(')[0].strip() 
-                                   for line in content.splitlines() 
-                                   if line.strip().startswith('def ')]
-            
-            return metadata
-        except:
-            return {}
-
-    def _can_analyze_content(self, file_path: str) -> bool:
+    def _can_analyze_content(self, file_path: str, probe: Optional[FileProbe] = None) -> bool:
         """
         Determine if file content should be analyzed based on type and size
         """
         try:
-            extension = os.path.splitext(file_path)[1].lower()
-            size = os.path.getsize(file_path)
+            if probe is None:
+                probe = FileProbe.from_path(file_path)
+            extension = probe.extension
+            size = probe.size
             
             # Support more text-based files and increase size limit for Korean text
             is_text = False
-            mime_type = magic.from_file(file_path, mime=True)
             
             # Check if it's a text file, source code, or specific mime types
-            if (mime_type.startswith('text/') or 
-                mime_type in ['application/x-java-source', 'application/javascript', 'text/x-java-source'] or
+            if (probe.is_text or
                 extension in ['.java', '.py', '.js', '.txt', '.json', '.xml', '.yaml', '.yml']):
                 is_text = True
             
+            # PDF and Office documents are sampled by the document reader within its own size limit
+            if self.document_reader.kind(probe):
+                return True
+            
             # Increased size limit to 5MB for text files
             max_size = 5 * 1024 * 1024  # 5MB
             return is_text and size < max_size
@@ -398,136 +636,91 @@ class FileAnalyzer:
             print(f"Error checking content analyzability: {str(e)}")
             return False
 
-    def _analyze_content(self, file_path: str, metadata: Dict[str, Any]) -> Dict[str, Any]:
+    def _analyze_content(self, file_path: str, metadata: Dict[str, Any],
+                         content: Optional[str] = None) -> Dict[str, Any]:
         """
         Analyze file content using configured LLM provider for PARA categorization
         """
         try:
-            # Get file content based on type
-            content = self._get_file_content(file_path)
+            # Get file content based on type unless the local stage already read it
+            if content is None:
+                content = self._get_file_content(file_path)
             if not content:
                 return {'success': False, 'error': 'Could not read file content'}
             
+            sample = content[:self.content_reader.sample_chars]
+            
+            # Structured mode: JSON response validated against the analysis schema
+            if self.content_analyzer.structured_output:
+                prompt = PARA_JSON_PROMPT.format(
+                    name=metadata.get('name', ''),
+                    mime_type=metadata.get('mime_type', ''),
+                    content=sample
+                )
+                response = self.content_analyzer._query_llm(prompt, {'json': True})
+                print("\nDebug - LLM JSON Response:", response)  # Debug log
+                fields = validate_analysis(parse_json_response(response)) if response else None
+                if fields is not None:
+                    return self._content_analysis_from_fields(fields)
+                print("Debug - Structured response invalid, falling back to text format")  # Debug log
+            
             # Create analysis prompt
-            prompt = f"""Analyze this file and provide:
-1. PARA category (Projects, Areas, Resources, Archives) with Korean translation
-2. Subcategory that best fits the content
-3. Confidence level (high, medium, low)
-4. Brief summary of the content
-5. Keywords (comma-separated)
-6. Suggest a descriptive filename (without extension) that reflects the content
-
-File: {metadata.get('name', '')}
-Type: {metadata.get('mime_type', '')}
-Content: {content[:2000]}  # Limit content to first 2000 chars
-
-Format the response exactly like this:
-Category: **category_name (한글)**
-Subcategory: **subcategory_name (한글)**
-Confidence: **level**
-Summary: [brief summary]
-Keywords: [comma-separated keywords]
-Suggested name: [descriptive_filename_without_extension]
-"""
+            prompt = PARA_ANALYSIS_PROMPT.format(
+                name=metadata.get('name', ''),
+                mime_type=metadata.get('mime_type', ''),
+                content=sample
+            )
             
             # Use ContentAnalyzer for LLM queries instead of direct API calls
-            analysis_text = self.content_analyzer._query_llm(prompt)
+            analysis_text = self.content_analyzer._query_llm(prompt, {'fields': TEXT_FIELD_LABELS})
             print("\nDebug - LLM Response:", analysis_text)  # Debug log
             if not analysis_text:
                 print("Debug - No response from LLM")  # Debug log
                 return {'success': False, 'error': 'Failed to get response from LLM'}
             
-            # Extract suggested name from analysis
-            suggested_name = None
-            print("\nDebug - Parsing response lines:")  # Debug log
-            for line in analysis_text.split('\n'):
-                print(f"Debug - Checking line: {line}")  # Debug log
-                if line.lower().startswith('suggested name:') or line.lower().startswith('suggested filename:'):
-                    # Remove markdown formatting and clean the suggested name
-                    suggested_name = line.split(':', 1)[1].strip()
-                    suggested_name = re.sub(r'\*\*|\*', '', suggested_name)  # Remove markdown formatting
-                    suggested_name = suggested_name.strip()
-                    print(f"Debug - Found suggested name: {suggested_name}")  # Debug log
-                    break
-            
-            print(f"\nDebug - Final suggested name: {suggested_name}")  # Debug log
-            return {
-                'success': True,
-                'analysis': analysis_text,
-                'suggested_name': suggested_name
-            }
+            # Parse the response once into typed fields
+            fields = parse_analysis_text(analysis_text)
+            print(f"\nDebug - Parsed fields: {fields}")  # Debug log
+            return self._content_analysis_from_fields(fields, analysis_text)
             
         except Exception as e:
             print(f"Error in content analysis: {str(e)}")
             return {'success': False, 'error': str(e)}
 
-    def _get_file_content(self, file_path: str) -> Optional[str]:
+    def _get_file_content(self, file_path: str, probe: Optional[FileProbe] = None) -> Optional[str]:
         """
-        Get file content with proper encoding handling.
-        Tries multiple encodings for Korean text support.
+        Get the prompt sample of a file's content.
+        The file is read once as bytes, capped at the sample size, and the
+        encoding (utf-8, cp949, euc-kr, latin-1) is sniffed from a small prefix.
         """
-        # Try different encodings for text files
-        encodings = ['utf-8', 'cp949', 'euc-kr', 'iso-8859-1']
-        
-        # First check if it's a text file
-        path = Path(file_path)
-        extension = path.suffix.lower()
-        
-        # Special handling for Java files
-        if extension == '.java':
-            try:
-                with open(file_path, 'rb') as f:
-                    content = f.read()
-                    # Try multiple encodings
-                    for encoding in encodings:
-                        try:
-                            decoded = content.decode(encoding)
-                            print(f"Successfully decoded Java file with {encoding}")
-                            return decoded
-                        except UnicodeDecodeError:
-                            continue
-                    # Fallback to replace invalid characters
-                    return content.decode('utf-8', errors='replace')
-            except Exception as e:
-                print(f"Error reading Java file: {str(e)}")
-                return None
-        
-        # For other text files
-        if not self._is_text_file(path):
-            print(f"Not a text file: {file_path}")
-            return "[Binary file content not shown]"
-            
-        # Try reading with different encodings
-        for encoding in encodings:
-            try:
-                with open(file_path, 'r', encoding=encoding) as f:
-                    content = f.read(1024 * 1024)  # Read up to 1MB
-                    if len(content.strip()) > 0:
-                        print(f"Successfully read file with {encoding} encoding")
-                        return content
-            except UnicodeDecodeError:
-                continue
-            except Exception as e:
-                print(f"Error reading file with {encoding}: {str(e)}")
-                continue
-        
-        # If all encodings fail, try binary read and decode
         try:
-            with open(file_path, 'rb') as f:
-                content = f.read(1024 * 1024)  # Read up to 1MB
-                # Try to decode as utf-8 with error handling
-                return content.decode('utf-8', errors='replace')
+            if probe is None:
+                probe = FileProbe.from_path(file_path)
+            
+            if self.document_reader.kind(probe):
+                sample = self.document_reader.read_sample(probe)
+                return sample.text if sample else None
+            
+            # Java sources are analyzed even when libmagic doesn't call them text
+            if not probe.is_text and probe.extension != '.java':
+                print(f"Not a text file: {file_path}")
+                return "[Binary file content not shown]"
+            
+            sample = self.content_reader.read_sample(probe)
+            print(f"Read {sample.bytes_read} bytes with {sample.encoding} encoding")
+            return sample.text
         except Exception as e:
-            print(f"Error reading file in binary mode: {str(e)}")
+            print(f"Error reading file: {str(e)}")
             return None
 
-    def _is_text_file(self, path: Path) -> bool:
-        """Check if the file is a text file."""
-        mime_type = magic.Magic(mime=True).from_file(str(path))
-        return mime_type.startswith('text/') or mime_type in ['application/x-java-source', 'application/javascript']
-
     def stop(self):
         """
         Stop ongoing analysis
         """
         self.stop_flag.set()
+        # Documents still queued for text extraction are dropped with the pool
+        self.document_reader.close()
+
+    def close(self):
+        """Shut down the document extraction worker processes."""
+        self.document_reader.close()
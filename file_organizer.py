@@ -1,14 +1,20 @@
 import os
+import errno
 import shutil
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, Any, Optional, Tuple
 import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import json
-import re
 from config_manager import ConfigManager
 from error_handler import ErrorHandler, FileCategorizationError, FileOperationError, RetryableError
 from file_renamer import FileRenamer
+from transfer_engine import TransferEngine
+from move_planner import MovePlanner
+from operation_journal import OperationJournal
+from backup_manifest import ManifestBackup
+from analysis_schema import PARA_CATEGORIES, ensure_fields
 
 class FileOrganizer:
     def __init__(self, config_manager: ConfigManager = None):
@@ -22,10 +28,14 @@ class FileOrganizer:
             "failed": 0,
             "skipped": 0
         }
-        self._undo_stack = []
-        self._redo_stack = []
+        # Moves of the current run; loaded from the latest journal on first undo/redo
+        self.journal = None
+        self._vacated = set()  # source folders files were moved out of in this run
+        self.journal_settings = OperationJournal.settings_from_config(self.config_manager)
         self.source_dir = None  # Initialize source directory as None
+        self.transfer_engine = TransferEngine.from_config(self.config_manager)
         self.file_renamer = FileRenamer()  # Initialize file renamer
+        self._devices = {}  # target directory -> st_dev
 
     def get_stats(self) -> Dict[str, int]:
         """Get current operation statistics"""
@@ -34,98 +44,297 @@ class FileOrganizer:
     def process_batch(self, files: list, analysis_results: Dict[str, Any], 
                      progress_callback: Optional[callable] = None) -> None:
         """Process a batch of files with progress tracking"""
-        total_files = len(files)
+        plan = self.plan_moves(self.source_dir, {f: analysis_results.get(f, {}) for f in files})
+        self.apply_plan(plan, progress_callback)
+
+    def plan_moves(self, source_dir: str, analysis_results: Dict[str, Any]) -> list:
+        """
+        Compute the target path of every file without moving anything.
+        See MovePlanner.plan for the entry format.
+        """
+        if not source_dir:
+            raise ValueError("Source directory not set. Call organize_files first.")
+        return MovePlanner(self).plan(source_dir, analysis_results)
+
+    def apply_plan(self, plan: list, progress_callback: Optional[callable] = None) -> None:
+        """
+        Execute a plan from plan_moves with progress tracking. Renames on the
+        same filesystem run in order; cross-device copies run in parallel.
+        Progress is always reported from the calling thread.
+        """
+        total_files = len(plan)
+        completed = 0
         
-        for idx, file_path in enumerate(files):
+        def finish(entry: Dict[str, Any], outcome: str, error: Optional[Exception]) -> None:
+            nonlocal completed
+            self.operation_stats[outcome] += 1
+            if error:
+                self.error_handler.handle_error(error, f"organizing {entry['source']}")
+            self.operation_stats["processed"] += 1
+            completed += 1
+            if progress_callback:
+                progress = completed / total_files * 100
+                progress_callback(progress, f"Organizing: {os.path.basename(entry['source'])}")
+        
+        transfers = []
+        for entry in plan:
             if self.stop_flag.is_set():
                 break
-                
-            try:
-                self.error_handler.retry_operation(
-                    self._process_single_file,
-                    file_path,
-                    analysis_results.get(file_path, {})
-                )
-                self.operation_stats["succeeded"] += 1
-            except Exception as e:
-                self.operation_stats["failed"] += 1
-                self.error_handler.handle_error(e, f"Processing {file_path}")
-                
-            self.operation_stats["processed"] += 1
+            if self._crosses_device(entry):
+                transfers.append(entry)
+                continue
+            finish(entry, *self._apply_entry(entry))
             
+        if transfers and not self.stop_flag.is_set():
+            with ThreadPoolExecutor(max_workers=self.transfer_engine.max_workers) as executor:
+                futures = {executor.submit(self._apply_entry, entry): entry for entry in transfers}
+                for future in as_completed(futures):
+                    outcome, error = future.result()
+                    if outcome:
+                        finish(futures[future], outcome, error)
+                    
+        if self.stop_flag.is_set():
+            # Renames after the stop and deferred cross-device transfers alike
+            remaining = total_files - completed
+            self.error_handler.log_info(f"Operation interrupted by user; {remaining} planned moves not made")
             if progress_callback:
-                progress = (idx + 1) / total_files * 100
-                progress_callback(progress, f"Processed {idx + 1}/{total_files} files")
+                progress_callback(completed / total_files * 100 if total_files else 0,
+                                  f"Operation cancelled: {remaining} of {total_files} files not moved")
 
-    def _process_single_file(self, file_path: str, analysis: Dict[str, Any]) -> None:
-        """Process a single file with undo/redo support"""
+    def _apply_entry(self, entry: Dict[str, Any]) -> Tuple[Optional[str], Optional[Exception]]:
+        """Stats outcome of one planned move and its error; no outcome if stopped first"""
+        if self.stop_flag.is_set():
+            return None, None
         try:
-            main_category, sub_category = self.determine_para_category(file_path, analysis)
-            target_dir = self._get_target_directory(main_category, sub_category)
-            
-            # Save original state for undo
-            original_state = {
-                "path": file_path,
-                "target": target_dir
-            }
-            
-            # Move file with smart rename
-            new_path = self._move_file(file_path, target_dir, analysis)
+            if self.error_handler.retry_operation(self._process_single_file, entry):
+                return "succeeded", None
+            return "skipped", None
+        except Exception as e:
+            return "failed", e
+
+    def _crosses_device(self, entry: Dict[str, Any]) -> bool:
+        try:
+            return os.stat(entry["source"]).st_dev != self._device(os.path.dirname(entry["target"]))
+        except OSError:
+            return False
+
+    def _process_single_file(self, entry: Dict[str, Any]) -> bool:
+        """Move one planned file with undo/redo support; False if it is already in place"""
+        if entry["target"] == entry["source"]:
+            return False
+        try:
+            if entry["renamed"]:
+                print(f"[Smart Rename] {os.path.basename(entry['source'])}\n  → New name: {os.path.basename(entry['target'])}\n  → Location: {entry['folder']}")
+            self._move_file(entry["source"], entry["target"])
+            return True
             
-            # Record operation for undo
-            self._undo_stack.append({
+        except Exception as e:
+            raise RetryableError(f"Failed to process {entry['source']}: {str(e)}")
+
+    def begin_run(self, source_dir: str) -> OperationJournal:
+        """Start journaling a new organize run; undo and redo then apply to this run"""
+        if self.journal:
+            self.journal.close()
+        self.journal = OperationJournal.create(source_dir, self.journal_settings)
+        self._vacated = set()
+        return self.journal
+
+    def open_run(self, run_id: Optional[str] = None, source_dir: Optional[str] = None) -> bool:
+        """
+        Load a journaled run so it can be undone or redone, by id or the latest
+        one (of ``source_dir`` if given). False if there is no such run.
+        """
+        runs = OperationJournal.list_runs(self.journal_settings["path"], source_dir)
+        if run_id:
+            runs = [run for run in runs if run["run"] == run_id]
+        if not runs:
+            return False
+        if self.journal:
+            self.journal.close()
+        self.journal = OperationJournal.load(runs[-1]["path"], self.journal_settings)
+        self.source_dir = self.source_dir or self.journal.source_dir
+        return True
+
+    def _current_journal(self) -> Optional[OperationJournal]:
+        if self.journal is None and self.journal_settings.get("enabled", True):
+            # After a restart, continue with the most recent run
+            self.open_run()
+        return self.journal
+
+    def get_undo_history(self) -> list:
+        """Moves of the current run that can be undone, oldest first, in a JSON-serializable form"""
+        journal = self._current_journal()
+        if not journal:
+            return []
+        history = []
+        for op_id in journal.undo_ids():
+            source, target, _ = journal.operation(op_id)
+            history.append({
                 "operation": "move",
-                "original": original_state,
-                "new": {"path": new_path}
+                "original": {"path": source, "target": os.path.dirname(target)},
+                "new": {"path": target}
             })
-            
-            # Clear redo stack after new operation
-            self._redo_stack.clear()
-            
-        except Exception as e:
-            raise RetryableError(f"Failed to process {file_path}: {str(e)}")
+        return history
+
+    def can_undo(self) -> bool:
+        journal = self._current_journal()
+        return bool(journal and journal.peek_undo() is not None)
+
+    def _restore(self, source: str, target: str) -> None:
+        """Move a file from ``source`` back to ``target``; nothing to do if it is already there"""
+        if not os.path.exists(source) and os.path.exists(target):
+            # The move was journaled but never happened (the process died first)
+            return
+        self._relocate(source, target)
 
     def undo(self) -> bool:
         """Undo last operation"""
-        if not self._undo_stack:
+        journal = self._current_journal()
+        op_id = journal.peek_undo() if journal else None
+        if op_id is None:
             return False
             
-        operation = self._undo_stack.pop()
+        source, target, _ = journal.operation(op_id)
         try:
-            if operation["operation"] == "move":
-                # Move file back to original location
-                shutil.move(operation["new"]["path"], operation["original"]["path"])
-                self._redo_stack.append(operation)
-                return True
+            # Move file back to original location and name
+            self._restore(target, source)
+            journal.record_undo(op_id)
+            return True
         except Exception as e:
+            # The move stays on the undo stack so it can be retried
             self.error_handler.handle_error(e, "Undo operation")
             return False
 
     def redo(self) -> bool:
         """Redo last undone operation"""
-        if not self._redo_stack:
+        journal = self._current_journal()
+        op_id = journal.peek_redo() if journal else None
+        if op_id is None:
             return False
             
-        operation = self._redo_stack.pop()
+        source, target, _ = journal.operation(op_id)
         try:
-            if operation["operation"] == "move":
-                # Redo the move operation
-                shutil.move(operation["original"]["path"], operation["new"]["path"])
-                self._undo_stack.append(operation)
-                return True
+            # Redo the move operation
+            self._restore(source, target)
+            journal.record_redo(op_id)
+            return True
         except Exception as e:
             self.error_handler.handle_error(e, "Redo operation")
             return False
 
-    def create_backup(self, source_dir: str) -> str:
+    def undo_run(self, progress_callback=None, result_callback=None) -> Dict[str, int]:
+        """Undo every move of the current run; see rollback"""
+        return self.rollback(progress_callback=progress_callback, result_callback=result_callback)
+
+    def _rollback_journals(self, run_id: Optional[str], since: Optional[float],
+                           until: Optional[float]) -> list:
+        """Journals to roll back, newest run first"""
+        if run_id:
+            return [self.journal] if self.open_run(run_id) else []
+        if since is None and until is None:
+            journal = self._current_journal()
+            return [journal] if journal else []
+            
+        # A time range may span several runs of the source directory
+        journals = []
+        for run in reversed(OperationJournal.list_runs(self.journal_settings["path"], self.source_dir)):
+            if self.journal and run["run"] == self.journal.run_id:
+                journals.append(self.journal)
+            else:
+                journals.append(OperationJournal.load(run["path"], self.journal_settings))
+        if not journals and self.journal:
+            journals.append(self.journal)
+        return journals
+
+    def _rollback_group(self, journal: OperationJournal, op_ids: list) -> list:
+        """
+        Reverse one group of dependent moves, newest first. After a failure
+        the older moves of the group are left alone, since they need the
+        failed one out of the way. Returns (moved path, original path, error).
+        """
+        results = []
+        for op_id in op_ids:
+            source, target, _ = journal.operation(op_id)
+            if self.stop_flag.is_set() or (results and results[-1][2]):
+                break
+            try:
+                self._restore(target, source)
+                journal.record_undo(op_id)
+                results.append((target, source, None))
+            except Exception as e:
+                results.append((target, source, e))
+        return results
+
+    def rollback(self, run_id: Optional[str] = None, since: Optional[float] = None,
+                 until: Optional[float] = None, progress_callback=None,
+                 result_callback=None) -> Dict[str, int]:
+        """
+        Undo the moves of a run (the current one by default), or of every run
+        of the source directory made within [since, until] (epoch seconds).
+        Each file returns to its original path and name. Moves that share a
+        path are reversed in order; independent ones run in parallel on
+        ``journal.rollback_workers`` threads. Progress and ``result_callback``
+        (moved path, original path) are reported from the calling thread.
+        Moves that fail stay in the journal for another attempt.
+        """
+        journals = self._rollback_journals(run_id, since, until)
+        work = [(journal, journal.undo_ids_between(since, until)) for journal in journals]
+        total = sum(len(op_ids) for _, op_ids in work)
+        counts = {"restored": 0, "failed": 0}
+        completed = 0
+        workers = max(1, int(self.journal_settings.get("rollback_workers", 8)))
+        
+        for journal, op_ids in work:
+            if self.stop_flag.is_set():
+                break
+            if not op_ids:
+                continue
+            groups = journal.dependency_groups(op_ids)
+            with ThreadPoolExecutor(max_workers=min(workers, len(groups))) as executor:
+                futures = [executor.submit(self._rollback_group, journal, group) for group in groups]
+                for future in as_completed(futures):
+                    for moved_path, original_path, error in future.result():
+                        completed += 1
+                        if error:
+                            counts["failed"] += 1
+                            self.error_handler.handle_error(error, f"undoing move of {original_path}")
+                        else:
+                            counts["restored"] += 1
+                            if result_callback:
+                                result_callback(moved_path, original_path)
+                        if progress_callback:
+                            progress_callback(completed / total * 100,
+                                              f"Restoring: {os.path.basename(original_path)}")
+            journal.sync()
+            if journal is not self.journal:
+                journal.close()
+                
+        counts["remaining"] = total - counts["restored"]
+        return counts
+
+    def create_backup(self, source_dir: str, plan: Optional[list] = None) -> str:
         """
-        Create a backup of the source directory
+        Create a backup of the source directory. With a plan and backup_mode
+        "manifest", only the files the plan moves are backed up (see
+        ManifestBackup); backup_mode "full" copies the whole tree.
         """
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         backup_dir = f"{source_dir}_backup_{timestamp}"
-        shutil.copytree(source_dir, backup_dir)
+        if plan is None or self.config_manager.get_setting("backup_mode", "manifest") == "full":
+            shutil.copytree(source_dir, backup_dir)
+            return backup_dir
+            
+        paths = [entry["source"] for entry in plan if entry["target"] != entry["source"]]
+        manifest = ManifestBackup().create(source_dir, paths, backup_dir)
+        if len(manifest["files"]) < len(paths):
+            raise FileOperationError(
+                f"Backed up only {len(manifest['files'])} of {len(paths)} files to {backup_dir}")
         return backup_dir
 
+    def restore_backup(self, backup_dir: str, overwrite: bool = False) -> Dict[str, int]:
+        """Put the files of a manifest backup back at their original paths"""
+        return ManifestBackup().restore(backup_dir, overwrite)
+
     def get_para_category_name(self, main_category: str, sub_category: str) -> Optional[str]:
         """
         Get the localized PARA category name based on current language setting
@@ -147,64 +356,21 @@ class FileOrganizer:
 
     def determine_para_category(self, file_path: str, analysis: Dict[str, Any]) -> Tuple[str, str]:
         """Determine PARA category based on file analysis"""
-        main_category = ''
-        sub_category = ''
-        
         # Default to 'other/uncategorized'
         default_category = ('other', 'other')
         
         try:
             # Check if we have content analysis results
-            if 'content_analysis' in analysis and analysis['content_analysis'].get('success'):
-                analysis_text = analysis['content_analysis']['analysis']
-                print(f"Content analysis found: {analysis_text}")
+            content_analysis = analysis.get('content_analysis')
+            if content_analysis and content_analysis.get('success'):
+                # Typed fields are set at analysis time; older records are parsed once here
+                ensure_fields(content_analysis)
+                main_category = content_analysis.get('category', '')
+                sub_category = content_analysis.get('subcategory', '')
                 
-                # Parse PARA category from analysis
-                if 'Category:' in analysis_text:
-                    lines = analysis_text.split('\n')
-                    for line in lines:
-                        if line.startswith('Category:'):
-                            # Remove markdown formatting and clean the text
-                            category_text = line.split(':', 1)[1].strip()
-                            # Remove markdown formatting (**, etc.)
-                            category_text = re.sub(r'\*\*|\*', '', category_text)
-                            # Extract main category (handle Korean in parentheses)
-                            main_match = re.match(r'([^(]+)(?:\s*\([^)]+\))?', category_text)
-                            if main_match:
-                                main_category = main_match.group(1).strip().lower()
-                        elif line.startswith('Subcategory:'):
-                            # Remove markdown formatting and clean the text
-                            subcategory_text = line.split(':', 1)[1].strip()
-                            # Remove markdown formatting (**, etc.)
-                            subcategory_text = re.sub(r'\*\*|\*', '', subcategory_text)
-                            # Extract subcategory (handle Korean in parentheses)
-                            sub_match = re.match(r'([^(]+)(?:\s*\([^)]+\))?', subcategory_text)
-                            if sub_match:
-                                sub_category = sub_match.group(1).strip().lower()
-                    
-                    # Map the categories to our structure
-                    main_category_map = {
-                        'projects': 'projects',
-                        'project': 'projects',
-                        'areas': 'areas',
-                        'area': 'areas',
-                        'resources': 'resources',
-                        'resource': 'resources',
-                        'archives': 'archives',
-                        'archive': 'archives',
-                        '프로젝트': 'projects',
-                        '영역': 'areas',
-                        '자료': 'resources',
-                        '보관': 'archives'
-                    }
-                    
-                    # Clean and map the main category
-                    main_category = main_category_map.get(main_category.lower().strip(), '')
-                    
-                    if main_category in ['projects', 'areas', 'resources', 'archives']:
-                        if sub_category:
-                            print(f"Found category from analysis: {main_category}/{sub_category}")
-                            return main_category, sub_category
+                if main_category in PARA_CATEGORIES and sub_category:
+                    print(f"Found category from analysis: {main_category}/{sub_category}")
+                    return main_category, sub_category
                             
             print(f"No valid category found in analysis, using default: {default_category}")
             return default_category
@@ -213,6 +379,22 @@ class FileOrganizer:
             print(f"Error determining category: {str(e)}")
             return default_category
 
+    def category_folders(self, source_dir: str) -> set:
+        """
+        Paths (os.path.normcase'd) of the PARA category folders under
+        source_dir in every language: each category folder and its top-level
+        folder.
+        """
+        folders = set()
+        category_names = self.config_manager.get_setting("category_names", {}) or {}
+        for categories in category_names.values():
+            for subcategories in categories.values():
+                for folder in subcategories.values():
+                    parts = folder.replace('\\', '/').split('/')
+                    folders.add(os.path.normcase(os.path.join(source_dir, parts[0])))
+                    folders.add(os.path.normcase(os.path.join(source_dir, *parts)))
+        return folders
+
     def _get_target_directory(self, main_category: str, sub_category: str) -> str:
         """Get the target directory for a file based on its PARA category"""
         if not self.source_dir:
@@ -220,73 +402,60 @@ class FileOrganizer:
         category_path = self.get_para_category_name(main_category, sub_category)
         return os.path.join(self.source_dir, category_path)
 
-    def _move_file(self, file_path: str, target_dir: str, analysis: Dict[str, Any] = None) -> str:
-        """Move a file to the target directory with optional smart renaming"""
+    def _move_file(self, file_path: str, target_path: str) -> str:
+        """Move a file to its planned path, renaming it on the way, and journal the move"""
         if not os.path.exists(file_path):
             raise FileOperationError(f"Source file not found: {file_path}")
-            
-        if not os.path.exists(target_dir):
-            os.makedirs(target_dir, exist_ok=True)
-        
-        current_path = file_path
-        renamed_path = None
-        
-        # Step 1: Rename the file if we have analysis data
-        if analysis and analysis.get('content_analysis'):
-            content_analysis = analysis['content_analysis']
-            if content_analysis.get('success', False):
-                suggested_name = content_analysis.get('suggested_name', '')
-                
-                if suggested_name:
-                    print(f"[Smart Rename] {os.path.basename(file_path)}\n  → New name: {suggested_name}{os.path.splitext(file_path)[1]}\n  → Location: {os.path.relpath(target_dir, os.path.dirname(file_path))}")
-                    
-                    suggestion = {
-                        'success': True,
-                        'suggested_name': suggested_name
-                    }
-                    
-                    # Try to rename the file in its current location
-                    rename_result = self.file_renamer.rename_with_suggestion(current_path, suggestion)
-                    if rename_result.get('success'):
-                        renamed_path = rename_result.get('new_path')
-                        if renamed_path and os.path.exists(renamed_path):
-                            current_path = renamed_path
-                            print(f"Successfully renamed file to: {os.path.basename(renamed_path)}")
-                        else:
-                            self.error_handler.log_warning(f"Renamed file not found: {renamed_path}, using original name")
-                            renamed_path = None
-                    else:
-                        self.error_handler.log_warning(f"Rename failed: {rename_result.get('error', 'Unknown error')}")
-                else:
-                    print("No rename suggestion found in analysis")
-        
-        # Step 2: Move the file (either renamed or original) to target directory
-        target_filename = os.path.basename(current_path)
-        target_path = os.path.join(target_dir, target_filename)
         
-        # Handle file name conflicts at target location
-        if os.path.exists(target_path) and target_path != current_path:
+        # The plan was made from a directory listing; only if a file appeared
+        # there since then fall back to probing for a free name
+        if os.path.exists(target_path):
             base, ext = os.path.splitext(target_path)
             counter = 1
             while os.path.exists(f"{base}_{counter}{ext}"):
                 counter += 1
             target_path = f"{base}_{counter}{ext}"
-        
+            
+        # Journaled first, so a move interrupted by a crash can still be undone
+        journal = self.journal or self.begin_run(self.source_dir)
+        op_id = journal.record_move(file_path, target_path)
         try:
-            # Only move if the target is different from current location
-            if os.path.normpath(os.path.dirname(current_path)) != os.path.normpath(target_dir):
-                shutil.move(current_path, target_path)
-                return target_path
-            else:
-                return current_path
+            self._relocate(file_path, target_path)
+            self._vacated.add(os.path.dirname(file_path))
+            return target_path
         except Exception as e:
-            # If move fails and we renamed the file, try to restore original name
-            if renamed_path and file_path != current_path:
-                try:
-                    shutil.move(current_path, file_path)
-                except:
-                    pass  # If restoration fails, continue with the error
-            raise FileOperationError(f"Failed to move file {current_path} to {target_path}: {str(e)}")
+            journal.record_abort(op_id)
+            raise FileOperationError(f"Failed to move file {file_path} to {target_path}: {str(e)}")
+
+    def _device(self, directory: str) -> int:
+        """Device of a directory, or of its nearest existing parent if not created yet"""
+        device = self._devices.get(directory)
+        if device is None:
+            existing = directory
+            while not os.path.isdir(existing) and os.path.dirname(existing) != existing:
+                existing = os.path.dirname(existing)
+            device = os.stat(existing).st_dev
+            if existing == directory:
+                self._devices[directory] = device
+        return device
+
+    def _relocate(self, source: str, target: str) -> None:
+        """
+        Move and rename a file in one step. On the same filesystem this is a
+        single atomic os.rename; data is only copied across devices, by the
+        transfer engine, which verifies the copy before removing the source.
+        """
+        target_dir = os.path.dirname(target)
+        os.makedirs(target_dir, exist_ok=True)
+        if os.stat(source).st_dev == self._device(target_dir):
+            try:
+                os.rename(source, target)
+                return
+            except OSError as e:
+                # Bind mounts and some network shares report one device but refuse the rename
+                if e.errno != errno.EXDEV:
+                    raise
+        self.transfer_engine.move(source, target)
 
     def remove_empty_folders(self, directory: str):
         """
@@ -306,6 +475,46 @@ class FileOrganizer:
                     print(f"Error removing directory {dir_path}: {str(e)}")
         return removed_count
 
+    def prune_emptied_folders(self, source_dir: str, directories, keep=()) -> int:
+        """
+        Remove folders left empty by a run: the given folders and, as they
+        empty, their parents up to (not including) source_dir. Folders in
+        ``keep`` and their parents are never removed. Only these folders are
+        touched, in one deepest-first pass, so the cost follows the change set.
+        Returns the number of folders removed.
+        """
+        root = os.path.normcase(os.path.abspath(source_dir))
+        protected = set()
+        for directory in keep:
+            directory = os.path.normcase(os.path.abspath(directory))
+            while directory.startswith(root + os.sep) and directory not in protected:
+                protected.add(directory)
+                directory = os.path.dirname(directory)
+        
+        candidates = set()
+        for directory in directories:
+            directory = os.path.abspath(directory)
+            while os.path.normcase(directory).startswith(root + os.sep) and directory not in candidates:
+                candidates.add(directory)
+                directory = os.path.dirname(directory)
+        
+        removed_count = 0
+        kept = set()
+        # Children before parents, so a parent is tried only after its emptied children are gone
+        for directory in sorted(candidates, key=lambda d: d.count(os.sep), reverse=True):
+            if directory in kept or os.path.normcase(directory) in protected:
+                kept.add(os.path.dirname(directory))
+                continue
+            try:
+                # rmdir only succeeds on an empty folder, so no listing is needed
+                os.rmdir(directory)
+                removed_count += 1
+            except FileNotFoundError:
+                pass
+            except OSError:
+                kept.add(os.path.dirname(directory))
+        return removed_count
+
     def organize_files(self, source_dir: str, analysis_results: Dict[str, Any],
                       remove_empty: bool = False, progress_callback=None) -> None:
         """
@@ -313,47 +522,33 @@ class FileOrganizer:
         """
         try:
             self.source_dir = source_dir  # Set the source directory
+            plan = self.plan_moves(source_dir, analysis_results)
             
             if self.config_manager.get_setting("backup_enabled", False):
                 try:
-                    backup_dir = self.create_backup(source_dir)
+                    backup_dir = self.create_backup(source_dir, plan)
                     if progress_callback:
                         progress_callback(0, f"Created backup at: {backup_dir}")
                 except Exception as e:
+                    # Moving files the backup does not cover would defeat the backup
                     self.error_handler.handle_error(FileOperationError(str(e)), "backup creation")
-
-            total_files = len(analysis_results)
-            processed = 0
-
-            for file_path, analysis in analysis_results.items():
-                if self.stop_flag.is_set():
-                    self.error_handler.log_info("Operation interrupted by user")
                     if progress_callback:
-                        progress_callback(processed / total_files * 100, "Operation cancelled")
-                    break
+                        progress_callback(0, f"Backup incomplete, no files were moved: {str(e)}")
+                    return
 
-                try:
-                    self.error_handler.retry_operation(
-                        self._process_single_file,
-                        file_path,
-                        analysis
-                    )
-                    self.operation_stats["succeeded"] += 1
-                except Exception as e:
-                    self.operation_stats["failed"] += 1
-                    self.error_handler.handle_error(e, f"organizing {file_path}")
-                    
-                self.operation_stats["processed"] += 1
-                
-                if progress_callback:
-                    progress = (processed + 1) / total_files * 100
-                    progress_callback(progress, f"Organizing: {os.path.basename(file_path)}")
-                processed += 1
+            self.begin_run(source_dir)
+            try:
+                self.apply_plan(plan, progress_callback)
+            finally:
+                self.journal.sync()
 
             if remove_empty and not self.stop_flag.is_set():
                 if progress_callback:
                     progress_callback(100, "Removing empty folders...")
-                removed_count = self.remove_empty_folders(source_dir)
+                # Category folders stay even when a run empties them
+                keep = {os.path.dirname(entry["target"]) for entry in plan}
+                keep |= self.category_folders(os.path.abspath(source_dir))
+                removed_count = self.prune_emptied_folders(source_dir, self._vacated, keep=keep)
                 if progress_callback:
                     progress_callback(100, f"Completed. Removed {removed_count} empty folders.")
             elif progress_callback:
@@ -363,11 +558,11 @@ class FileOrganizer:
             self.stop_flag.set()
             error_msg = self.error_handler.handle_error(KeyboardInterrupt(), "during organization")
             if progress_callback:
-                progress_callback(processed / total_files * 100, error_msg)
+                progress_callback(0, error_msg)
         except Exception as e:
             error_msg = self.error_handler.handle_error(e, "during organization")
             if progress_callback:
-                progress_callback(processed / total_files * 100, error_msg)
+                progress_callback(0, error_msg)
 
     def stop(self):
         """
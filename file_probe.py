@@ -0,0 +1,77 @@
+import os
+import threading
+from typing import Optional
+import magic
+
+# MIME types that are text even though they are not under text/*
+TEXT_MIME_TYPES = ['application/x-java-source', 'application/javascript', 'text/x-java-source']
+
+_magic_handle = None
+_magic_lock = threading.Lock()
+
+
+def detect_mime(buffer: bytes) -> str:
+    """Sniff a MIME type with one shared, long-lived libmagic handle."""
+    global _magic_handle
+    # libmagic cookies are not thread-safe, so all lookups go through the lock
+    with _magic_lock:
+        if _magic_handle is None:
+            _magic_handle = magic.Magic(mime=True)
+        return _magic_handle.from_buffer(buffer)
+
+
+class FileProbe:
+    """
+    Everything analysis needs to know about a file from the disk, gathered once:
+    the stat result, a single header read, the sniffed MIME type and the
+    text/binary verdict.
+    """
+
+    HEADER_SIZE = 8192
+
+    __slots__ = ('path', 'stat', 'header', 'mime_type', 'is_text', 'error')
+
+    def __init__(self, path: str, stat: os.stat_result, header: bytes,
+                 mime_type: str, is_text: bool, error: Optional[str] = None):
+        self.path = path
+        self.stat = stat
+        self.header = header
+        self.mime_type = mime_type
+        self.is_text = is_text
+        self.error = error
+
+    @classmethod
+    def from_path(cls, path: str, stats: Optional[os.stat_result] = None,
+                  header_size: int = HEADER_SIZE) -> "FileProbe":
+        """Probe a file, reusing stat data from the scanner when available."""
+        if stats is None:
+            stats = os.stat(path)
+
+        with open(path, 'rb') as f:
+            header = f.read(header_size)
+
+        error = None
+        try:
+            mime_type = detect_mime(header)
+        except Exception as e:
+            error = str(e)
+            mime_type = f"File type detection failed: {error}"
+
+        is_text = mime_type.startswith('text/') or mime_type in TEXT_MIME_TYPES
+        return cls(path, stats, header, mime_type, is_text, error)
+
+    @property
+    def size(self) -> int:
+        return self.stat.st_size
+
+    @property
+    def extension(self) -> str:
+        return os.path.splitext(self.path)[1].lower()
+
+    @property
+    def header_is_complete(self) -> bool:
+        """True when the header read covered the whole file."""
+        return len(self.header) >= self.stat.st_size
+
+    def __repr__(self) -> str:
+        return f"FileProbe({self.path!r}, mime_type={self.mime_type!r}, size={self.size})"
@@ -0,0 +1,97 @@
+import os
+import queue
+import threading
+from typing import Iterator, Optional, Iterable
+
+
+class FileRecord:
+    """A file found by the scanner, carrying the stat data from its directory entry."""
+
+    __slots__ = ('path', 'name', 'stat')
+
+    def __init__(self, path: str, name: str, stat: os.stat_result):
+        self.path = path
+        self.name = name
+        self.stat = stat
+
+    def __repr__(self) -> str:
+        return f"FileRecord({self.path!r}, size={self.stat.st_size})"
+
+
+class DirectoryScanner:
+    """
+    Single-pass os.scandir traversal that streams FileRecords as they are found.
+
+    Files are yielded in the same order as os.walk (top-down, files of a directory
+    before its subdirectories). With prefetch enabled the traversal runs on a
+    background thread so ``discovered`` grows ahead of the consumer and can be
+    used as an incremental progress total.
+    """
+
+    _DONE = object()
+
+    def __init__(self, directory: str, stop_flag: Optional[threading.Event] = None,
+                 prefetch: bool = True, exclude: Optional[Iterable[str]] = None):
+        self.directory = directory
+        # Directories (os.path.normcase'd paths) that are not descended into
+        self.exclude = set(exclude or ())
+        self.stop_flag = stop_flag or threading.Event()
+        self.prefetch = prefetch
+        self.discovered = 0
+        self.finished = False
+
+    def scan(self) -> Iterator[FileRecord]:
+        """Walk the tree once, yielding a record per file."""
+        pending = [self.directory]
+        while pending:
+            if self.stop_flag.is_set():
+                break
+            current = pending.pop()
+            subdirs = []
+            try:
+                with os.scandir(current) as entries:
+                    for entry in entries:
+                        if self.stop_flag.is_set():
+                            break
+                        try:
+                            if entry.is_dir():
+                                # Symlinked directories are neither descended into nor
+                                # treated as files, as with os.walk(followlinks=False)
+                                if not entry.is_symlink() and os.path.normcase(entry.path) not in self.exclude:
+                                    subdirs.append(entry.path)
+                                continue
+                            # DirEntry.stat() is cached and, on Windows, free of extra syscalls
+                            stats = entry.stat()
+                        except OSError as e:
+                            print(f"Error reading {entry.path}: {str(e)}")
+                            continue
+                        self.discovered += 1
+                        yield FileRecord(entry.path, entry.name, stats)
+            except OSError as e:
+                print(f"Error scanning {current}: {str(e)}")
+                continue
+            # Reverse so the first subdirectory is popped next, matching os.walk order
+            pending.extend(reversed(subdirs))
+        self.finished = True
+
+    def __iter__(self) -> Iterator[FileRecord]:
+        if not self.prefetch:
+            yield from self.scan()
+            return
+
+        records = queue.Queue()
+
+        def produce():
+            try:
+                for record in self.scan():
+                    records.put(record)
+            finally:
+                records.put(self._DONE)
+
+        thread = threading.Thread(target=produce, name="directory-scanner", daemon=True)
+        thread.start()
+        while True:
+            record = records.get()
+            if record is self._DONE:
+                break
+            yield record
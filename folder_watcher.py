@@ -0,0 +1,253 @@
+import os
+import time
+import importlib
+import threading
+from typing import Dict, Any, Optional, Callable, List
+from file_scanner import DirectoryScanner
+
+# Names of files that are still being written by another program (or by the transfer engine)
+TEMPORARY_SUFFIXES = ('.partial', '.part', '.crdownload', '.download', '.tmp')
+
+
+class FolderWatcher:
+    """
+    Organizes files as they arrive in a folder. File system events (create,
+    move, close-after-write) from watchdog, or scandir snapshots when
+    watchdog or inotify is unavailable, mark files as pending. A file is
+    picked up once no event has arrived for ``debounce_seconds`` and its size
+    and mtime have not changed for ``stable_seconds``. Ready files are
+    analyzed and organized in micro-batches of up to ``batch_size``.
+
+    Events inside the PARA category folders and for the watcher's own moves
+    are ignored, so organized files are not picked up again.
+    """
+
+    DEFAULT_SETTINGS = {
+        "debounce_seconds": 2.0,
+        "stable_seconds": 2.0,
+        "batch_size": 20,
+        "poll_interval": 5.0,
+        "use_polling": False
+    }
+
+    def __init__(self, source_dir: str, analyzer, organizer, settings: Dict[str, Any] = None,
+                 use_content: bool = True,
+                 result_callback: Optional[Callable[[str, Dict[str, Any], Dict[str, Any]], None]] = None):
+        self.settings = {**self.DEFAULT_SETTINGS, **(settings or {})}
+        self.source_dir = os.path.abspath(source_dir)
+        self.analyzer = analyzer
+        self.organizer = organizer
+        self.use_content = use_content
+        self.result_callback = result_callback
+        self.debounce = float(self.settings["debounce_seconds"])
+        self.stable = float(self.settings["stable_seconds"])
+        self.batch_size = max(1, int(self.settings["batch_size"]))
+        self.stop_flag = threading.Event()
+        self.mode = None
+        # Category folders are never watched; organized files land there
+        self.excluded = organizer.category_folders(self.source_dir)
+        self._pending = {}      # path -> time of the last event
+        self._signatures = {}   # path -> ((size, mtime_ns), time first seen with it)
+        self._ignored = {}      # normcase'd path -> expiry of an own move
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._observer = None
+        self._poller = None
+        self.stats = {"events": 0, "ignored": 0, "batches": 0, "organized": 0, "failed": 0}
+
+    @classmethod
+    def from_config(cls, source_dir: str, analyzer, organizer, config_manager,
+                    **kwargs) -> "FolderWatcher":
+        settings = {}
+        if config_manager:
+            settings = config_manager.get_setting("watch", {}) or {}
+        return cls(source_dir, analyzer, organizer, settings, **kwargs)
+
+    def _is_ignored(self, path: str) -> bool:
+        if os.path.basename(path).lower().endswith(TEMPORARY_SUFFIXES):
+            return True
+        normalized = os.path.normcase(os.path.abspath(path))
+        if any(normalized.startswith(root + os.sep) for root in self.excluded):
+            return True
+        expiry = self._ignored.get(normalized)
+        return expiry is not None and expiry > time.monotonic()
+
+    def notify(self, path: str, new_only: bool = False) -> None:
+        """Mark a file as changed; ``new_only`` only refreshes files already pending."""
+        if self._is_ignored(path):
+            with self._lock:
+                self.stats["ignored"] += 1
+            return
+        with self._lock:
+            if new_only and path not in self._pending:
+                return
+            self._pending[path] = time.monotonic()
+            self.stats["events"] += 1
+        self._wake.set()
+
+    def _start_observer(self) -> bool:
+        """Subscribe to file system events; False if watchdog cannot be used here."""
+        try:
+            observers = importlib.import_module('watchdog.observers')
+            events = importlib.import_module('watchdog.events')
+        except ImportError as e:
+            print(f"watchdog is not available, polling instead: {str(e)}")
+            return False
+
+        watcher = self
+
+        class Handler(events.FileSystemEventHandler):
+            def on_created(self, event):
+                if not event.is_directory:
+                    watcher.notify(event.src_path)
+
+            def on_moved(self, event):
+                if not event.is_directory:
+                    watcher.notify(event.dest_path)
+
+            def on_closed(self, event):
+                watcher.notify(event.src_path)
+
+            def on_modified(self, event):
+                # Platforms without close events report writes as modifications
+                if not event.is_directory:
+                    watcher.notify(event.src_path, new_only=True)
+
+        observer = observers.Observer()
+        try:
+            observer.schedule(Handler(), self.source_dir, recursive=True)
+            observer.start()
+        except OSError as e:
+            # e.g. the inotify watch limit is reached
+            print(f"File system events unavailable, polling instead: {str(e)}")
+            return False
+        self._observer = observer
+        return True
+
+    def _poll_loop(self) -> None:
+        """Fallback: diff scandir snapshots of the folder every ``poll_interval`` seconds."""
+        previous = None
+        interval = float(self.settings["poll_interval"])
+        while not self.stop_flag.is_set():
+            scanner = DirectoryScanner(self.source_dir, self.stop_flag, prefetch=False,
+                                       exclude=self.excluded)
+            snapshot = {record.path: (record.stat.st_size, record.stat.st_mtime_ns)
+                        for record in scanner.scan()}
+            if previous is not None:
+                for path, signature in snapshot.items():
+                    if previous.get(path) != signature:
+                        self.notify(path)
+            previous = snapshot
+            self.stop_flag.wait(interval)
+
+    def _ready_paths(self) -> List[str]:
+        """Pending files that have been quiet and unchanged long enough, up to one batch."""
+        now = time.monotonic()
+        with self._lock:
+            pending = list(self._pending.items())
+        ready = []
+        for path, last_event in pending:
+            if now - last_event < self.debounce:
+                continue
+            try:
+                stats = os.stat(path)
+            except OSError:
+                with self._lock:
+                    self._pending.pop(path, None)
+                self._signatures.pop(path, None)
+                continue
+            signature = (stats.st_size, stats.st_mtime_ns)
+            seen = self._signatures.get(path)
+            if seen is None or seen[0] != signature:
+                self._signatures[path] = (signature, now)
+                continue
+            if now - seen[1] < self.stable:
+                continue
+            ready.append((path, last_event))
+            if len(ready) >= self.batch_size:
+                break
+
+        with self._lock:
+            for path, last_event in ready:
+                # A newer event means the file changed again; it stays pending
+                if self._pending.get(path) == last_event:
+                    del self._pending[path]
+        for path, _ in ready:
+            self._signatures.pop(path, None)
+        return [path for path, _ in ready]
+
+    def _process_batch(self, paths: List[str]) -> None:
+        results = {}
+        for path in paths:
+            if self.stop_flag.is_set():
+                return
+            results[path] = self.analyzer.analyze_file(path, use_content=self.use_content)
+
+        plan = self.organizer.plan_moves(self.source_dir, results)
+        # Register the moves before making them; their events arrive asynchronously
+        expiry = time.monotonic() + self.debounce + self.stable + 60
+        with self._lock:
+            for entry in plan:
+                self._ignored[os.path.normcase(os.path.abspath(entry["target"]))] = expiry
+            now = time.monotonic()
+            for path in [path for path, until in self._ignored.items() if until <= now]:
+                del self._ignored[path]
+
+        before = self.organizer.get_stats()
+        self.organizer.apply_plan(plan)
+        self.organizer.journal.sync()
+        after = self.organizer.get_stats()
+        self.stats["batches"] += 1
+        self.stats["organized"] += after["succeeded"] - before["succeeded"]
+        self.stats["failed"] += after["failed"] - before["failed"]
+        if self.result_callback:
+            for entry in plan:
+                self.result_callback(entry["source"], results[entry["source"]], entry)
+
+    def run(self) -> None:
+        """
+        Watch and organize until stop() is called. Batches are processed on
+        the calling thread; observer or poller threads only queue paths.
+        """
+        self.organizer.source_dir = self.source_dir
+        self.organizer.begin_run(self.source_dir)
+        if not self.settings["use_polling"] and self._start_observer():
+            self.mode = "events"
+        else:
+            self.mode = "polling"
+            self._poller = threading.Thread(target=self._poll_loop, daemon=True)
+            self._poller.start()
+
+        tick = max(0.1, min(self.debounce, self.stable, 1.0) / 2)
+        try:
+            while not self.stop_flag.is_set():
+                self._wake.wait(tick)
+                self._wake.clear()
+                ready = self._ready_paths()
+                if ready:
+                    self._process_batch(ready)
+        finally:
+            self.close()
+
+    def stop(self) -> None:
+        self.stop_flag.set()
+        self._wake.set()
+
+    def close(self) -> None:
+        self.stop_flag.set()
+        if self._observer:
+            self._observer.stop()
+            self._observer.join()
+            self._observer = None
+        if self._poller:
+            self._poller.join()
+            self._poller = None
+        if self.organizer.journal:
+            self.organizer.journal.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.stats)
+        stats["mode"] = self.mode
+        stats["pending"] = len(self._pending)
+        return stats
@@ -196,17 +196,23 @@ class FileOrganizerGUI(ctk.CTk):
                                         **button_style)
         self.redo_button.grid(row=0, column=4, padx=8, pady=5)
         
+        self.undo_all_button = ctk.CTkButton(self.button_frame, text="Undo All",
+                                            command=self.undo_run_operation,
+                                            fg_color=self.colors["primary"],
+                                            **button_style)
+        self.undo_all_button.grid(row=0, column=5, padx=8, pady=5)
+        
         self.settings_button = ctk.CTkButton(self.button_frame, text="Settings",
                                            command=self.show_settings,
                                            fg_color=self.colors["primary"],
                                            **button_style)
-        self.settings_button.grid(row=0, column=5, padx=8, pady=5)
+        self.settings_button.grid(row=0, column=6, padx=8, pady=5)
         
         self.stop_button = ctk.CTkButton(self.button_frame, text="Stop",
                                         command=self.stop_processing,
                                         fg_color="#E74C3C",  # Red for stop button
                                         **button_style)
-        self.stop_button.grid(row=0, column=6, padx=8, pady=5)
+        self.stop_button.grid(row=0, column=7, padx=8, pady=5)
 
     def browse_source(self):
         directory = filedialog.askdirectory()
@@ -305,38 +311,24 @@ class FileOrganizerGUI(ctk.CTk):
         self.preview_text.delete("1.0", tk.END)
         preview_text = "Preview of file organization:\n\n"
         
-        # Get smart rename setting
-        rules = self.config_manager.get_organization_rules()
-        smart_rename_enabled = rules.get("smart_rename_enabled", True)
-        print(f"Smart rename enabled: {smart_rename_enabled}")
+        # The organizer executes exactly this plan
+        try:
+            plan = self.file_organizer.plan_moves(self.source_entry.get(), self.analysis_results)
+        except Exception as e:
+            print(f"Error planning organization: {str(e)}")
+            CTkMessagebox(title="Error", message=f"Error generating preview: {str(e)}", icon="error")
+            return
         
-        for file_path, analysis in self.analysis_results.items():
-            try:
-                print(f"\nProcessing file: {file_path}")
-                print(f"Analysis: {analysis}")
-                
-                main_category, sub_category = self.file_organizer.determine_para_category(file_path, analysis)
-                category_path = self.file_organizer.get_para_category_name(main_category, sub_category)
-                print(f"Category: {main_category}/{sub_category} -> {category_path}")
-                
-                # Show original name and smart rename suggestion if enabled
-                original_name = os.path.basename(file_path)
-                content_analysis = analysis.get('content_analysis', {})
-                if smart_rename_enabled and content_analysis.get('success') and 'suggested_name' in content_analysis:
-                    suggested_name = content_analysis['suggested_name']
-                    print(f"Found rename suggestion: {suggested_name}")
-                    new_name = f"{suggested_name}{os.path.splitext(original_name)[1]}"
-                    preview_text += f"[Smart Rename] {original_name}\n"
-                    preview_text += f"  → New name: {new_name}\n"
-                    preview_text += f"  → Location: {category_path}\n\n"
-                else:
-                    if smart_rename_enabled:
-                        print("No rename suggestion found in analysis")
-                    preview_text += f"{original_name} → {category_path}\n\n"
-                    
-            except Exception as e:
-                print(f"Error processing file {file_path}: {str(e)}")
-                preview_text += f"{os.path.basename(file_path)} → Error: {str(e)}\n\n"
+        for entry in plan:
+            original_name = os.path.basename(entry["source"])
+            new_name = os.path.basename(entry["target"])
+            print(f"{entry['source']} -> {entry['target']}")
+            if new_name != original_name:
+                preview_text += f"[Smart Rename] {original_name}\n"
+                preview_text += f"  → New name: {new_name}\n"
+                preview_text += f"  → Location: {entry['folder']}\n\n"
+            else:
+                preview_text += f"{original_name} → {entry['folder']}\n\n"
                 
         self.preview_text.insert("1.0", preview_text)
 
@@ -359,6 +351,20 @@ class FileOrganizerGUI(ctk.CTk):
         else:
             CTkMessagebox(title="Error", message="Nothing to undo", icon="warning")
 
+    def undo_run_operation(self):
+        """Undo every move of the last organize run"""
+        if not self.file_organizer.can_undo():
+            CTkMessagebox(title="Error", message="Nothing to undo", icon="warning")
+            return
+        counts = self.file_organizer.undo_run(progress_callback=self.update_progress)
+        self.update_stats()
+        if counts["failed"]:
+            CTkMessagebox(title="Error",
+                         message=f"Restored {counts['restored']} files; {counts['failed']} could not be moved back",
+                         icon="warning")
+        else:
+            CTkMessagebox(title="Success", message=f"Restored {counts['restored']} files", icon="info")
+
     def redo_operation(self):
         """Redo last undone operation"""
         if self.file_organizer.redo():
@@ -369,4 +375,7 @@ class FileOrganizerGUI(ctk.CTk):
 
 if __name__ == "__main__":
     app = FileOrganizerGUI()
-    app.mainloop()
+    try:
+        app.mainloop()
+    finally:
+        app.file_analyzer.close()
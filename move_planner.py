@@ -0,0 +1,118 @@
+import os
+import re
+from typing import Dict, Any, List, Optional, Tuple
+
+# Generated paths at or beyond this length are rejected (Windows MAX_PATH)
+MAX_PATH_LENGTH = 260
+
+
+class DirectoryIndex:
+    """
+    Names present in each target directory, read with a single listdir the
+    first time a directory is used. Names handed out by ``claim`` are added
+    to the index, so collisions between planned files are resolved in memory.
+    """
+
+    def __init__(self):
+        self._names = {}
+        self._counters = {}
+
+    def _load(self, directory: str) -> set:
+        names = self._names.get(directory)
+        if names is None:
+            try:
+                names = {os.path.normcase(name) for name in os.listdir(directory)}
+            except (FileNotFoundError, NotADirectoryError):
+                names = set()
+            self._names[directory] = names
+        return names
+
+    def claim(self, directory: str, name: str, current: Optional[str] = None) -> str:
+        """
+        Reserve a free name in the directory, adding ``_<n>`` before the
+        extension on collision. ``current`` is the file's own path, which
+        does not collide with itself.
+        """
+        names = self._load(directory)
+        if current and os.path.normcase(os.path.join(directory, name)) == os.path.normcase(current):
+            names.add(os.path.normcase(name))
+            return name
+        if os.path.normcase(name) not in names:
+            names.add(os.path.normcase(name))
+            return name
+
+        base, ext = os.path.splitext(name)
+        key = (directory, os.path.normcase(base), os.path.normcase(ext))
+        # Continue from the last suffix handed out for this name instead of probing from 1
+        counter = self._counters.get(key, 0) + 1
+        while os.path.normcase(f"{base}_{counter}{ext}") in names:
+            counter += 1
+        self._counters[key] = counter
+        candidate = f"{base}_{counter}{ext}"
+        names.add(os.path.normcase(candidate))
+        return candidate
+
+
+class MovePlanner:
+    """
+    Works out the final category folder and file name of every analyzed file
+    before anything is touched. The same plan drives the preview and the
+    organizer, so what is shown is what gets moved.
+    """
+
+    def __init__(self, organizer):
+        self.organizer = organizer
+        rules = organizer.config_manager.get_organization_rules()
+        self.smart_rename_enabled = rules.get("smart_rename_enabled", True)
+
+    def _target_name(self, file_path: str, analysis: Dict[str, Any]) -> Tuple[str, bool]:
+        """File name after smart rename, and whether it differs from the original."""
+        original_name = os.path.basename(file_path)
+        content_analysis = analysis.get('content_analysis') or {}
+        if not (self.smart_rename_enabled and content_analysis.get('success')):
+            return original_name, False
+        suggested_name = self.organizer.file_renamer.clean_name(content_analysis.get('suggested_name', ''))
+        if not suggested_name:
+            return original_name, False
+        name = f"{suggested_name}{os.path.splitext(file_path)[1].lower()}"
+        return name, name != original_name
+
+    @staticmethod
+    def _already_placed(file_path: str, target_dir: str, name: str) -> bool:
+        """Whether the file sits in its target folder under the name or a ``_<n>`` variant of it."""
+        if os.path.normcase(os.path.dirname(file_path)) != os.path.normcase(target_dir):
+            return False
+        base, ext = os.path.splitext(name)
+        pattern = re.escape(base) + r'(_\d+)?' + re.escape(ext)
+        return re.fullmatch(pattern, os.path.basename(file_path), re.IGNORECASE) is not None
+
+    def plan(self, source_dir: str, analysis_results: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        One entry per file: source, target, category, subcategory, folder and
+        renamed. Entries whose target equals the source need no move.
+        """
+        index = DirectoryIndex()
+        entries = []
+        for file_path, analysis in analysis_results.items():
+            analysis = analysis or {}
+            main_category, sub_category = self.organizer.determine_para_category(file_path, analysis)
+            folder = self.organizer.get_para_category_name(main_category, sub_category)
+            target_dir = os.path.join(source_dir, folder)
+
+            name, renamed = self._target_name(file_path, analysis)
+            if renamed and len(os.path.abspath(os.path.join(target_dir, name))) >= MAX_PATH_LENGTH:
+                print(f"Suggested name too long for {file_path}, keeping original name")
+                name, renamed = os.path.basename(file_path), False
+
+            if self._already_placed(file_path, target_dir, name):
+                name, renamed = os.path.basename(file_path), False
+            name = index.claim(target_dir, name, current=file_path)
+            entries.append({
+                "source": file_path,
+                "target": os.path.join(target_dir, name),
+                "category": main_category,
+                "subcategory": sub_category,
+                "folder": folder,
+                "renamed": renamed,
+            })
+        return entries
@@ -0,0 +1,147 @@
+import re
+import zipfile
+from xml.etree import ElementTree
+from typing import Dict, Any, List, Optional
+
+_W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+_A = '{http://schemas.openxmlformats.org/drawingml/2006/main}'
+_S = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+_TEXT = '{urn:oasis:names:tc:opendocument:xmlns:text:1.0}'
+_DC = '{http://purl.org/dc/elements/1.1/}'
+_CP = '{http://schemas.openxmlformats.org/package/2006/metadata/core-properties}'
+_DCTERMS = '{http://purl.org/dc/terms/}'
+_EP = '{http://schemas.openxmlformats.org/officeDocument/2006/extended-properties}'
+_META = '{urn:oasis:names:tc:opendocument:xmlns:meta:1.0}'
+
+# Office formats are zip containers; the sampler reads these extensions
+OFFICE_EXTENSIONS = ['.docx', '.xlsx', '.pptx', '.odt', '.ods', '.odp']
+
+OFFICE_MIME_TYPES = [
+    'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+    'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'application/vnd.openxmlformats-officedocument.presentationml.presentation',
+    'application/vnd.oasis.opendocument.text',
+    'application/vnd.oasis.opendocument.spreadsheet',
+    'application/vnd.oasis.opendocument.presentation',
+]
+
+# Properties parts are tiny; anything larger is not worth parsing
+MAX_PROPERTIES_SIZE = 1024 * 1024
+
+
+def _text_parts(archive: zipfile.ZipFile) -> List[str]:
+    """Parts holding the document text, in reading order."""
+    names = set(archive.namelist())
+    if 'word/document.xml' in names:
+        return ['word/document.xml']
+    if 'xl/sharedStrings.xml' in names:
+        return ['xl/sharedStrings.xml']
+    slides = [name for name in names if re.match(r'ppt/slides/slide\d+\.xml$', name)]
+    if slides:
+        return sorted(slides, key=lambda name: int(re.search(r'(\d+)\.xml$', name).group(1)))
+    if 'content.xml' in names:
+        return ['content.xml']
+    return []
+
+
+def _stream_text(stream, max_chars: int, parts: List[str], length: int) -> int:
+    """
+    Collect paragraphs from one XML part with iterparse, clearing elements as
+    they finish so memory stays flat. Returns the new total length.
+    """
+    for _, elem in ElementTree.iterparse(stream, events=('end',)):
+        tag = elem.tag
+        if tag in (_W + 'p', _A + 'p', _S + 'si', _TEXT + 'p', _TEXT + 'h'):
+            if tag in (_TEXT + 'p', _TEXT + 'h'):
+                # ODF puts text in nested spans and tails
+                text = ''.join(elem.itertext())
+            else:
+                text = ''.join(' ' if node.tag == _W + 'tab' else node.text or ''
+                               for node in elem.iter()
+                               if node.tag in (_W + 't', _A + 't', _S + 't', _W + 'tab'))
+            elem.clear()
+            if text.strip():
+                parts.append(text)
+                length += len(text) + 1
+                if length >= max_chars:
+                    break
+    return length
+
+
+def sample_office_text(path: str, max_chars: int = 2000) -> str:
+    """
+    Text from the start of a DOCX, XLSX, PPTX or OpenDocument file. The XML
+    is decompressed and parsed only until ``max_chars`` characters are found.
+    """
+    parts = []
+    length = 0
+    with zipfile.ZipFile(path) as archive:
+        for name in _text_parts(archive):
+            with archive.open(name) as stream:
+                length = _stream_text(stream, max_chars, parts, length)
+            if length >= max_chars:
+                break
+    return '\n'.join(parts)[:max_chars]
+
+
+def _read_small_part(archive: zipfile.ZipFile, name: str) -> Optional[ElementTree.Element]:
+    try:
+        info = archive.getinfo(name)
+    except KeyError:
+        return None
+    if info.file_size > MAX_PROPERTIES_SIZE:
+        return None
+    with archive.open(info) as stream:
+        return ElementTree.parse(stream).getroot()
+
+
+def _child_text(root: ElementTree.Element, tag: str) -> str:
+    node = root.find('.//' + tag)
+    return (node.text or '').strip() if node is not None else ''
+
+
+def read_office_properties(path: str) -> Dict[str, Any]:
+    """Document properties from docProps/core.xml and app.xml, or meta.xml for OpenDocument."""
+    properties = {}
+    with zipfile.ZipFile(path) as archive:
+        core = _read_small_part(archive, 'docProps/core.xml')
+        if core is not None:
+            properties.update({
+                "author": _child_text(core, _DC + 'creator'),
+                "title": _child_text(core, _DC + 'title'),
+                "subject": _child_text(core, _DC + 'subject'),
+                "keywords": _child_text(core, _CP + 'keywords'),
+                "description": _child_text(core, _DC + 'description'),
+                "last_author": _child_text(core, _CP + 'lastModifiedBy'),
+                "revision": _child_text(core, _CP + 'revision'),
+                "created": _child_text(core, _DCTERMS + 'created'),
+                "modified": _child_text(core, _DCTERMS + 'modified'),
+            })
+            app = _read_small_part(archive, 'docProps/app.xml')
+            if app is not None:
+                for key, tag in (("pages", 'Pages'), ("words", 'Words'), ("slides", 'Slides')):
+                    value = _child_text(app, _EP + tag)
+                    if value.isdigit():
+                        properties[key] = int(value)
+            return properties
+
+        meta = _read_small_part(archive, 'meta.xml')
+        if meta is not None:
+            properties.update({
+                "author": _child_text(meta, _META + 'initial-creator'),
+                "title": _child_text(meta, _DC + 'title'),
+                "subject": _child_text(meta, _DC + 'subject'),
+                "keywords": ', '.join((node.text or '').strip() for node in meta.iter(_META + 'keyword')),
+                "description": _child_text(meta, _DC + 'description'),
+                "last_author": _child_text(meta, _DC + 'creator'),
+                "revision": _child_text(meta, _META + 'editing-cycles'),
+                "created": _child_text(meta, _META + 'creation-date'),
+                "modified": _child_text(meta, _DC + 'date'),
+            })
+            statistics = meta.find('.//' + _META + 'document-statistic')
+            if statistics is not None:
+                for key, attribute in (("pages", 'page-count'), ("words", 'word-count')):
+                    value = statistics.get(_META + attribute, '')
+                    if value.isdigit():
+                        properties[key] = int(value)
+    return properties
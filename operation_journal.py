@@ -0,0 +1,258 @@
+import os
+import json
+import time
+import uuid
+import threading
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+
+# Record types, one JSON array per line after the header:
+#   ["m", source, target, timestamp]  move, written before the file is moved
+#   ["x", id]                         the move failed and was not done
+#   ["u", id] / ["r", id]             the move was undone / redone
+MOVE, ABORT, UNDO, REDO = "m", "x", "u", "r"
+
+
+class OperationJournal:
+    """
+    Append-only journal of the moves of one organize run, stored as NDJSON.
+
+    Every record is flushed to the OS as it is written, so the journal
+    survives the process dying; fsync is batched (``sync_every`` records or
+    ``sync_interval`` seconds), so a power loss can lose at most that window.
+    Moves are identified by their position in the journal, and the undo and
+    redo stacks hold only those ids. Loading a journal replays the records
+    into the same state, so undo and redo keep working after a restart.
+    """
+
+    DEFAULT_DIRNAME = "journal"
+
+    DEFAULT_SETTINGS = {
+        "enabled": True,
+        "path": "",
+        "sync_every": 100,
+        "sync_interval": 1.0,
+        "keep_runs": 50,
+        "rollback_workers": 8
+    }
+
+    def __init__(self, path: Optional[str], run_id: str, source_dir: str,
+                 sync_every: int = 100, sync_interval: float = 1.0):
+        self.path = path
+        self.run_id = run_id
+        self.source_dir = source_dir
+        self.sync_every = max(1, int(sync_every))
+        self.sync_interval = float(sync_interval)
+        self._moves = []
+        self._undo = []
+        self._redo = []
+        self._file = None
+        self._pending = 0
+        self._last_sync = time.time()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def settings_from_config(config_manager) -> Dict[str, Any]:
+        """The ``journal`` setting with defaults, its directory resolved next to config.json."""
+        settings = dict(OperationJournal.DEFAULT_SETTINGS)
+        config_path = "config.json"
+        if config_manager:
+            settings.update(config_manager.get_setting("journal", {}) or {})
+            config_path = config_manager.config_path
+        settings["path"] = settings.get("path") or os.path.join(
+            os.path.dirname(os.path.abspath(config_path)), OperationJournal.DEFAULT_DIRNAME)
+        return settings
+
+    @classmethod
+    def create(cls, source_dir: str, settings: Dict[str, Any]) -> "OperationJournal":
+        """Start the journal of a new run; in memory only when journaling is disabled."""
+        run_id = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}"
+        path = None
+        if settings.get("enabled", True):
+            os.makedirs(settings["path"], exist_ok=True)
+            path = os.path.join(settings["path"], f"{run_id}.ndjson")
+        journal = cls(path, run_id, source_dir, settings.get("sync_every", 100),
+                      settings.get("sync_interval", 1.0))
+        if path:
+            journal._file = open(path, 'a', encoding='utf-8')
+            journal._write({"run": run_id, "source_dir": source_dir,
+                            "started": datetime.now().isoformat()})
+            journal.sync()
+            cls.prune(settings["path"], int(settings.get("keep_runs", 50)))
+        return journal
+
+    @classmethod
+    def load(cls, path: str, settings: Dict[str, Any] = None) -> "OperationJournal":
+        """Open an existing journal, replaying it to rebuild the undo and redo stacks."""
+        settings = settings or cls.DEFAULT_SETTINGS
+        with open(path, 'r', encoding='utf-8') as f:
+            header = json.loads(f.readline())
+            journal = cls(path, header["run"], header["source_dir"],
+                          settings.get("sync_every", 100), settings.get("sync_interval", 1.0))
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A torn last line from a crash mid-write
+                    break
+                journal._apply(record)
+        journal._file = open(path, 'a', encoding='utf-8')
+        return journal
+
+    @staticmethod
+    def list_runs(directory: str, source_dir: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Runs in the journal directory, oldest first, optionally only those of ``source_dir``."""
+        runs = []
+        try:
+            names = sorted(name for name in os.listdir(directory) if name.endswith(".ndjson"))
+        except FileNotFoundError:
+            return runs
+        for name in names:
+            path = os.path.join(directory, name)
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    header = json.loads(f.readline())
+            except (OSError, ValueError):
+                continue
+            if source_dir and os.path.normcase(header.get("source_dir", "")) != os.path.normcase(source_dir):
+                continue
+            runs.append({"run": header["run"], "path": path,
+                         "source_dir": header.get("source_dir"), "started": header.get("started")})
+        return runs
+
+    @staticmethod
+    def prune(directory: str, keep_runs: int) -> None:
+        """Delete the oldest journals beyond ``keep_runs``."""
+        if keep_runs <= 0:
+            return
+        names = sorted(name for name in os.listdir(directory) if name.endswith(".ndjson"))
+        for name in names[:-keep_runs]:
+            try:
+                os.remove(os.path.join(directory, name))
+            except OSError as e:
+                print(f"Could not remove old journal {name}: {str(e)}")
+
+    def _write(self, record) -> None:
+        if self._file is None:
+            return
+        self._file.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + "\n")
+        self._file.flush()
+        self._pending += 1
+        if self._pending >= self.sync_every or time.time() - self._last_sync >= self.sync_interval:
+            self._sync_locked()
+
+    def _sync_locked(self) -> None:
+        if self._file is not None and self._pending:
+            os.fsync(self._file.fileno())
+        self._pending = 0
+        self._last_sync = time.time()
+
+    def _apply(self, record: list) -> Optional[int]:
+        """Update the in-memory state for one record; returns the id of a new move."""
+        kind = record[0]
+        if kind == MOVE:
+            self._moves.append((record[1], record[2], record[3]))
+            op_id = len(self._moves) - 1
+            self._undo.append(op_id)
+            self._redo.clear()
+            return op_id
+        op_id = record[1]
+        if kind == ABORT:
+            self._remove(self._undo, op_id)
+        elif kind == UNDO:
+            self._remove(self._undo, op_id)
+            self._redo.append(op_id)
+        elif kind == REDO:
+            self._remove(self._redo, op_id)
+            self._undo.append(op_id)
+        return None
+
+    @staticmethod
+    def _remove(stack: list, op_id: int) -> None:
+        # Almost always the top of the stack; parallel moves can finish out of order
+        if stack and stack[-1] == op_id:
+            stack.pop()
+        elif op_id in stack:
+            stack.remove(op_id)
+
+    def _record(self, record: list) -> Optional[int]:
+        with self._lock:
+            op_id = self._apply(record)
+            self._write(record)
+            return op_id
+
+    def record_move(self, source: str, target: str) -> int:
+        """Journal a move before it is made; returns its id."""
+        return self._record([MOVE, source, target, round(time.time(), 3)])
+
+    def record_abort(self, op_id: int) -> None:
+        self._record([ABORT, op_id])
+
+    def record_undo(self, op_id: int) -> None:
+        self._record([UNDO, op_id])
+
+    def record_redo(self, op_id: int) -> None:
+        self._record([REDO, op_id])
+
+    def operation(self, op_id: int) -> Tuple[str, str, float]:
+        """(source, target, timestamp) of a move"""
+        return self._moves[op_id]
+
+    def peek_undo(self) -> Optional[int]:
+        with self._lock:
+            return self._undo[-1] if self._undo else None
+
+    def peek_redo(self) -> Optional[int]:
+        with self._lock:
+            return self._redo[-1] if self._redo else None
+
+    def undo_ids(self) -> List[int]:
+        """Ids of the moves that can be undone, oldest first"""
+        with self._lock:
+            return list(self._undo)
+
+    def undo_ids_between(self, since: Optional[float] = None, until: Optional[float] = None) -> List[int]:
+        """Undoable moves made within [since, until] (epoch seconds), oldest first"""
+        return [op_id for op_id in self.undo_ids()
+                if (since is None or self._moves[op_id][2] >= since)
+                and (until is None or self._moves[op_id][2] <= until)]
+
+    def dependency_groups(self, op_ids: List[int]) -> List[List[int]]:
+        """
+        Split moves into groups that share no path, each newest first. Moves
+        in one group (a file moved twice, a name freed and reused) must be
+        reversed in that order; separate groups are independent.
+        """
+        parent = {}
+
+        def find(key):
+            root = key
+            while parent[root] != root:
+                root = parent[root]
+            while parent[key] != root:
+                parent[key], key = root, parent[key]
+            return root
+
+        for op_id in op_ids:
+            source, target, _ = self._moves[op_id]
+            keys = [os.path.normcase(source), os.path.normcase(target)]
+            for key in keys:
+                parent.setdefault(key, key)
+            parent[find(keys[0])] = find(keys[1])
+
+        groups = {}
+        for op_id in op_ids:
+            root = find(os.path.normcase(self._moves[op_id][0]))
+            groups.setdefault(root, []).append(op_id)
+        return [sorted(group, reverse=True) for group in groups.values()]
+
+    def sync(self) -> None:
+        with self._lock:
+            self._sync_locked()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._sync_locked()
+                self._file.close()
+                self._file = None
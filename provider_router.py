@@ -0,0 +1,204 @@
+import time
+import threading
+from collections import deque
+from typing import Dict, Any, List, Optional, Callable
+
+
+class CircuitBreaker:
+    """
+    Per-provider circuit breaker. Opens after ``failure_threshold`` consecutive
+    failures; after ``reset_timeout`` seconds it becomes half-open and lets a
+    health probe or a single trial request decide whether to close again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30.0):
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.reset_timeout = float(reset_timeout)
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trial_in_flight = False
+
+    def available(self, now: float) -> bool:
+        """Whether a request could be sent now, without claiming the half-open trial slot."""
+        if self.state == self.OPEN and now - self.opened_at >= self.reset_timeout:
+            self.state = self.HALF_OPEN
+        return self.state == self.CLOSED or (self.state == self.HALF_OPEN and not self.trial_in_flight)
+
+    def allow(self, now: float) -> bool:
+        """Whether a request may be sent now; claims the trial slot when half-open."""
+        if self.state == self.OPEN and now - self.opened_at >= self.reset_timeout:
+            self.state = self.HALF_OPEN
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.HALF_OPEN and not self.trial_in_flight:
+            self.trial_in_flight = True
+            return True
+        return False
+
+    def release(self) -> None:
+        """Give back a claimed trial slot that was not used for a request."""
+        self.trial_in_flight = False
+
+    def record_success(self) -> None:
+        self.state = self.CLOSED
+        self.failures = 0
+        self.trial_in_flight = False
+
+    def record_failure(self, now: float) -> None:
+        self.failures += 1
+        self.trial_in_flight = False
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.state = self.OPEN
+            self.opened_at = now
+
+
+class LatencyWindow:
+    """Moving window of the most recent successful request latencies."""
+
+    def __init__(self, size: int = 50):
+        self.samples = deque(maxlen=max(1, int(size)))
+
+    def add(self, seconds: float) -> None:
+        self.samples.append(seconds)
+
+    def percentile(self, p: float) -> Optional[float]:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, max(0, round(p / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+
+class ProviderRouter:
+    """
+    Chooses which LLM provider serves each request: the fastest healthy one by
+    moving-window p50 latency, with the others as failover candidates.
+    Providers without latency samples are tried first so every provider gets measured.
+    """
+
+    DEFAULT_SETTINGS = {
+        "failure_threshold": 3,
+        "reset_timeout": 30,
+        "latency_window": 50,
+        "probe_interval": 0     # 0 probes only when an open circuit is due for a retry
+    }
+
+    def __init__(self, providers: List[str], settings: Dict[str, Any] = None,
+                 probe: Optional[Callable[[str], bool]] = None):
+        self.settings = {**self.DEFAULT_SETTINGS, **(settings or {})}
+        self.providers = list(providers)
+        self.probe = probe
+        self.breakers = {name: CircuitBreaker(self.settings["failure_threshold"],
+                                              self.settings["reset_timeout"])
+                         for name in self.providers}
+        self.latency = {name: LatencyWindow(self.settings["latency_window"]) for name in self.providers}
+        self.stats = {name: {"requests": 0, "failures": 0, "probes": 0} for name in self.providers}
+        self._probing = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+        interval = float(self.settings["probe_interval"])
+        if self.probe and interval > 0:
+            threading.Thread(target=self._probe_loop, args=(interval,),
+                             name="provider-probe", daemon=True).start()
+
+    def candidates(self) -> List[str]:
+        """
+        Providers to try for the next request, best first. Listing a provider
+        does not claim its half-open trial; acquire() does, right before the
+        request is sent.
+        """
+        now = time.monotonic()
+        allowed = []
+        with self._lock:
+            for index, name in enumerate(self.providers):
+                breaker = self.breakers[name]
+                if breaker.state == CircuitBreaker.OPEN and self.probe and \
+                        now - breaker.opened_at >= breaker.reset_timeout:
+                    # Let a health probe decide instead of spending a real request on it
+                    self._start_probe(name)
+                    continue
+                if breaker.available(now):
+                    p50 = self.latency[name].percentile(50)
+                    allowed.append((p50 is not None, p50 or 0.0, index, name))
+        return [name for _, _, _, name in sorted(allowed)]
+
+    def acquire(self, provider: str) -> bool:
+        """Whether a request may be sent to the provider now; claims its trial slot when half-open."""
+        with self._lock:
+            breaker = self.breakers.get(provider)
+            return breaker is None or breaker.allow(time.monotonic())
+
+    def release(self, provider: str) -> None:
+        """Undo acquire() when no request was sent, so the trial slot is not held forever."""
+        with self._lock:
+            breaker = self.breakers.get(provider)
+            if breaker is not None:
+                breaker.release()
+
+    def record(self, provider: str, ok: bool, latency: float) -> None:
+        with self._lock:
+            breaker = self.breakers.get(provider)
+            if breaker is None:
+                return
+            self.stats[provider]["requests"] += 1
+            if ok:
+                breaker.record_success()
+                self.latency[provider].add(latency)
+            else:
+                self.stats[provider]["failures"] += 1
+                breaker.record_failure(time.monotonic())
+                if breaker.state == CircuitBreaker.OPEN:
+                    print(f"Provider {provider} circuit opened after {breaker.failures} failures")
+
+    def _start_probe(self, provider: str) -> None:
+        """Run a health probe on a background thread; called with the lock held."""
+        if provider in self._probing:
+            return
+        self._probing.add(provider)
+        threading.Thread(target=self._run_probe, args=(provider,),
+                         name=f"provider-probe-{provider}", daemon=True).start()
+
+    def _run_probe(self, provider: str) -> None:
+        try:
+            healthy = bool(self.probe(provider))
+        except Exception as e:
+            print(f"Health probe for {provider} failed: {str(e)}")
+            healthy = False
+        with self._lock:
+            self._probing.discard(provider)
+            self.stats[provider]["probes"] += 1
+            breaker = self.breakers[provider]
+            if healthy:
+                breaker.record_success()
+            else:
+                breaker.record_failure(time.monotonic())
+
+    def _probe_loop(self, interval: float) -> None:
+        while not self._stop.wait(interval):
+            with self._lock:
+                for name in self.providers:
+                    self._start_probe(name)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = {}
+            for name in self.providers:
+                window = self.latency[name]
+                p50 = window.percentile(50)
+                p95 = window.percentile(95)
+                stats[name] = {
+                    **self.stats[name],
+                    "state": self.breakers[name].state,
+                    "p50_ms": p50 * 1000 if p50 is not None else None,
+                    "p95_ms": p95 * 1000 if p95 is not None else None
+                }
+        return stats
+
+    def close(self) -> None:
+        self._stop.set()
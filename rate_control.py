@@ -0,0 +1,242 @@
+import time
+import random
+import threading
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import Dict, Any, Optional, Callable
+import requests
+
+# Status codes that mean "slow down" rather than "this request is wrong"
+THROTTLE_STATUS_CODES = (429, 503)
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at ``rate`` tokens per second."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, amount: float = 1.0) -> float:
+        """Take ``amount`` tokens, sleeping until they are available. Returns the time waited."""
+        # A request larger than the bucket could never be admitted otherwise
+        amount = min(float(amount), self.capacity)
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return waited
+                delay = (amount - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+class RateController:
+    """
+    Admission control for one provider: request and token rate limits, an
+    AIMD concurrency limit driven by throttling, error rate and latency, and
+    retries of throttled requests that honour Retry-After.
+    """
+
+    DEFAULT_SETTINGS = {
+        "requests_per_second": 0,      # 0 disables the limit
+        "tokens_per_minute": 0,        # 0 disables the limit
+        "max_concurrency": 8,
+        "min_concurrency": 1,
+        "max_retries": 3,
+        "backoff_seconds": 1.0,
+        "max_backoff_seconds": 30.0,
+        "latency_target_ms": 0,        # 0 only reacts to throttling and errors
+        "error_rate_threshold": 0.2
+    }
+
+    WINDOW = 20
+
+    def __init__(self, name: str, settings: Dict[str, Any] = None):
+        self.name = name
+        self.settings = {**self.DEFAULT_SETTINGS, **(settings or {})}
+        rps = float(self.settings["requests_per_second"])
+        tpm = float(self.settings["tokens_per_minute"])
+        self.request_bucket = TokenBucket(rps, max(1.0, rps)) if rps > 0 else None
+        self.token_bucket = TokenBucket(tpm / 60.0, tpm) if tpm > 0 else None
+
+        self.max_concurrency = max(1, int(self.settings["max_concurrency"]))
+        self.min_concurrency = max(1, min(int(self.settings["min_concurrency"]), self.max_concurrency))
+        self.limit = float(self.max_concurrency)
+        self.in_flight = 0
+        self._blocked_until = 0.0
+        self._outcomes = deque(maxlen=self.WINDOW)
+        self._condition = threading.Condition()
+        self.stats = {
+            "requests": 0,
+            "throttled": 0,
+            "retries": 0,
+            "gave_up": 0,
+            "decreases": 0,
+            "rate_wait_time": 0.0
+        }
+
+    @classmethod
+    def from_settings(cls, name: str, settings: Optional[Dict[str, Any]]) -> Optional["RateController"]:
+        if settings is not None and not settings.get("enabled", True):
+            return None
+        return cls(name, settings)
+
+    def _count(self, name: str, amount: float = 1) -> None:
+        with self._condition:
+            self.stats[name] += amount
+
+    def _acquire_slot(self) -> None:
+        with self._condition:
+            while True:
+                pause = self._blocked_until - time.monotonic()
+                if pause > 0:
+                    self._condition.wait(pause)
+                elif self.in_flight >= int(self.limit):
+                    self._condition.wait()
+                else:
+                    self.in_flight += 1
+                    return
+
+    def _release_slot(self) -> None:
+        with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def _decrease(self, factor: float) -> None:
+        """Multiplicative decrease; called with the condition held."""
+        new_limit = max(float(self.min_concurrency), self.limit * factor)
+        if new_limit < self.limit:
+            self.stats["decreases"] += 1
+        self.limit = new_limit
+
+    def _record(self, ok: bool, latency: float) -> None:
+        with self._condition:
+            self._outcomes.append(ok)
+            errors = self._outcomes.count(False)
+            target = float(self.settings["latency_target_ms"]) / 1000
+            if not ok and len(self._outcomes) >= 5 and \
+                    errors / len(self._outcomes) > float(self.settings["error_rate_threshold"]):
+                self._decrease(0.5)
+                self._outcomes.clear()
+            elif ok and target and latency > target:
+                self._decrease(0.9)
+            elif ok:
+                # Additive increase: about +1 per limit's worth of successful requests
+                self.limit = min(float(self.max_concurrency), self.limit + 1.0 / self.limit)
+            self._condition.notify_all()
+
+    def _throttled(self, response: requests.Response, attempt: int) -> float:
+        """Back off after a 429/503 and return how long to wait before retrying."""
+        delay = parse_retry_after(response.headers.get("Retry-After"))
+        if delay is None:
+            backoff = float(self.settings["backoff_seconds"]) * (2 ** attempt)
+            delay = min(float(self.settings["max_backoff_seconds"]), backoff) * random.uniform(0.5, 1.0)
+        with self._condition:
+            self.stats["throttled"] += 1
+            self._decrease(0.5)
+            # Everyone waits, not just this request: the provider throttles the account
+            self._blocked_until = max(self._blocked_until, time.monotonic() + delay)
+        return delay
+
+    def _finish(self, ok: bool, started: float) -> None:
+        """Release the request's slot and feed its outcome and latency to the AIMD limit."""
+        self._release_slot()
+        self._record(ok, time.perf_counter() - started)
+
+    def _hold_until_closed(self, response: requests.Response, started: float) -> None:
+        """
+        Keep the slot of a streamed response until its body has been read and
+        the response closed, so the limit covers the whole exchange.
+        """
+        close = response.close
+        lock = threading.Lock()
+        finished = []
+
+        def close_and_release():
+            try:
+                close()
+            finally:
+                with lock:
+                    first = not finished
+                    finished.append(True)
+                if first:
+                    self._finish(response.status_code < 500, started)
+
+        response.close = close_and_release
+
+    def call(self, send: Callable[[], requests.Response], estimated_tokens: int = 0,
+             stream: bool = False) -> requests.Response:
+        """
+        Run ``send`` under the rate limits, retrying throttled responses up to
+        max_retries times. The last response is returned either way. With
+        ``stream`` the body is read by the caller, and the concurrency slot is
+        held until the caller closes the response.
+        """
+        attempt = 0
+        while True:
+            if self.request_bucket:
+                self._count("rate_wait_time", self.request_bucket.acquire(1))
+            if self.token_bucket and estimated_tokens:
+                self._count("rate_wait_time", self.token_bucket.acquire(estimated_tokens))
+
+            self._acquire_slot()
+            started = time.perf_counter()
+            try:
+                response = send()
+            except (requests.exceptions.Timeout, requests.exceptions.ConnectionError):
+                self._finish(False, started)
+                raise
+            except BaseException:
+                self._release_slot()
+                raise
+            self._count("requests")
+
+            if response.status_code not in THROTTLE_STATUS_CODES:
+                if stream:
+                    self._hold_until_closed(response, started)
+                else:
+                    self._finish(response.status_code < 500, started)
+                return response
+
+            self._release_slot()
+            delay = self._throttled(response, attempt)
+            if attempt >= int(self.settings["max_retries"]):
+                self._count("gave_up")
+                print(f"{self.name}: still throttled after {attempt} retries (status {response.status_code})")
+                return response
+            attempt += 1
+            self._count("retries")
+            print(f"{self.name}: throttled (status {response.status_code}), retrying in {delay:.1f}s")
+            response.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._condition:
+            stats = self.stats.copy()
+            stats["concurrency_limit"] = round(self.limit, 2)
+            stats["in_flight"] = self.in_flight
+        return stats
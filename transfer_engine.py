@@ -0,0 +1,202 @@
+import os
+import time
+import errno
+import shutil
+import hashlib
+import threading
+from typing import Dict, Any
+from error_handler import FileOperationError
+
+# Errors meaning "this copy method does not work for this pair of files"; the next method is tried
+UNSUPPORTED_ERRNOS = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP,
+                      getattr(errno, 'ENOTSUP', errno.EOPNOTSUPP), errno.EBADF}
+
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def _pread(fd: int, count: int, offset: int) -> bytes:
+    if hasattr(os, 'pread'):
+        return os.pread(fd, count, offset)
+    # Windows: each descriptor is only used by one transfer, so seeking is safe
+    os.lseek(fd, offset, os.SEEK_SET)
+    return os.read(fd, count)
+
+
+def _pwrite(fd: int, data, offset: int) -> int:
+    if hasattr(os, 'pwrite'):
+        return os.pwrite(fd, data, offset)
+    os.lseek(fd, offset, os.SEEK_SET)
+    return os.write(fd, data)
+
+
+class TransferEngine:
+    """
+    Copies files across devices for moves that cannot be a rename. Data is
+    copied kernel-side with os.copy_file_range or os.sendfile in large chunks,
+    falling back to a userspace copy. The source is hashed chunk by chunk in
+    the same loop, the destination is hashed once it is on disk, and the
+    source is only unlinked when both match. The engine is thread-safe, so
+    several transfers can run at once.
+    """
+
+    DEFAULT_SETTINGS = {
+        "chunk_size_mb": 64,
+        "max_workers": 4,
+        "verify": True
+    }
+
+    METHODS = ['copy_file_range', 'sendfile', 'userspace']
+
+    def __init__(self, settings: Dict[str, Any] = None):
+        self.settings = {**self.DEFAULT_SETTINGS, **(settings or {})}
+        self.chunk_size = max(1, int(float(self.settings["chunk_size_mb"]) * 1024 * 1024))
+        self.max_workers = max(1, int(self.settings["max_workers"]))
+        self.verify = bool(self.settings["verify"])
+        # (method, source device, target device) pairs that failed once; not retried
+        self._unsupported = set()
+        self._lock = threading.Lock()
+        self.stats = {"transfers": 0, "bytes": 0, "failures": 0, "verify_failures": 0,
+                      "time_total": 0.0, "methods": {method: 0 for method in self.METHODS}}
+
+    @classmethod
+    def from_config(cls, config_manager) -> "TransferEngine":
+        settings = {}
+        if config_manager:
+            settings = config_manager.get_setting("transfer", {}) or {}
+        return cls(settings)
+
+    def _count(self, key: str, amount: float = 1) -> None:
+        with self._lock:
+            self.stats[key] += amount
+
+    def _methods(self, devices: tuple) -> list:
+        methods = []
+        if hasattr(os, 'copy_file_range'):
+            methods.append('copy_file_range')
+        if hasattr(os, 'sendfile'):
+            methods.append('sendfile')
+        methods = [method for method in methods if (method,) + devices not in self._unsupported]
+        return methods + ['userspace']
+
+    @staticmethod
+    def _hash_range(fd: int, offset: int, length: int, hasher) -> None:
+        end = offset + length
+        while offset < end:
+            block = _pread(fd, min(HASH_BLOCK_SIZE, end - offset), offset)
+            if not block:
+                break
+            hasher.update(block)
+            offset += len(block)
+
+    def _copy_chunk(self, method: str, src_fd: int, dst_fd: int, offset: int, count: int,
+                    hasher) -> int:
+        """Copy up to ``count`` bytes at ``offset``; returns the bytes copied (0 at end of file)."""
+        if method == 'copy_file_range':
+            copied = os.copy_file_range(src_fd, dst_fd, count, offset, offset)
+        elif method == 'sendfile':
+            # sendfile writes at the destination's file position
+            os.lseek(dst_fd, offset, os.SEEK_SET)
+            copied = os.sendfile(dst_fd, src_fd, offset, count)
+        else:
+            data = _pread(src_fd, count, offset)
+            if hasher is not None:
+                hasher.update(data)
+            view = memoryview(data)
+            written = 0
+            while written < len(data):
+                written += _pwrite(dst_fd, view[written:], offset + written)
+            return len(data)
+
+        if hasher is not None and copied:
+            # Still in the page cache from the copy, so this costs no extra disk read
+            self._hash_range(src_fd, offset, copied, hasher)
+        return copied
+
+    def _copy_data(self, src_fd: int, dst_fd: int, size: int, devices: tuple, hasher) -> str:
+        """Copy the whole file, moving down the method list on unsupported errors."""
+        methods = self._methods(devices)
+        method = methods.pop(0)
+        offset = 0
+        while offset < size:
+            count = min(self.chunk_size, size - offset)
+            try:
+                copied = self._copy_chunk(method, src_fd, dst_fd, offset, count, hasher)
+            except OSError as e:
+                if method == 'userspace' or e.errno not in UNSUPPORTED_ERRNOS:
+                    raise
+                copied = None
+            if copied:
+                offset += copied
+                continue
+            if method == 'userspace':
+                raise FileOperationError(f"Source ended after {offset} of {size} bytes")
+            # Refused, or no progress (some filesystems return 0 instead of an error):
+            # continue from the same offset with the next method
+            with self._lock:
+                self._unsupported.add((method,) + devices)
+            method = methods.pop(0)
+        return method
+
+    def _file_digest(self, path: str) -> str:
+        hasher = hashlib.blake2b()
+        fd = os.open(path, os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+        try:
+            self._hash_range(fd, 0, os.fstat(fd).st_size, hasher)
+        finally:
+            os.close(fd)
+        return hasher.hexdigest()
+
+    def move(self, source: str, target: str) -> Dict[str, Any]:
+        """
+        Copy ``source`` to ``target``, verify it and remove the source.
+        The copy is written under a temporary name and renamed into place,
+        so ``target`` never holds a partial file. Raises FileOperationError
+        when verification fails; the source is then left untouched.
+        """
+        started = time.perf_counter()
+        target_dir = os.path.dirname(target)
+        partial = os.path.join(target_dir, f".{os.path.basename(target)}.partial")
+        hasher = hashlib.blake2b() if self.verify else None
+        try:
+            src_fd = os.open(source, os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+            try:
+                src_stat = os.fstat(src_fd)
+                dst_fd = os.open(partial, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0))
+                try:
+                    devices = (src_stat.st_dev, os.fstat(dst_fd).st_dev)
+                    method = self._copy_data(src_fd, dst_fd, src_stat.st_size, devices, hasher)
+                    if self.verify:
+                        os.fsync(dst_fd)
+                finally:
+                    os.close(dst_fd)
+            finally:
+                os.close(src_fd)
+
+            shutil.copystat(source, partial)
+            if os.path.getsize(partial) != src_stat.st_size or (
+                    self.verify and self._file_digest(partial) != hasher.hexdigest()):
+                self._count("verify_failures")
+                raise FileOperationError(f"Verification failed copying {source} to {target}")
+            os.rename(partial, target)
+        except Exception:
+            self._count("failures")
+            try:
+                os.unlink(partial)
+            except OSError:
+                pass
+            raise
+
+        os.unlink(source)
+        with self._lock:
+            self.stats["transfers"] += 1
+            self.stats["bytes"] += src_stat.st_size
+            self.stats["methods"][method] += 1
+            self.stats["time_total"] += time.perf_counter() - started
+        return {'success': True, 'new_path': target, 'method': method, 'bytes': src_stat.st_size,
+                'digest': hasher.hexdigest() if hasher else None}
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.stats)
+            stats["methods"] = dict(self.stats["methods"])
+            return stats